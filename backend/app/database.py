@@ -1,116 +1,218 @@
 import sqlite3
 import os
-from typing import Optional, List, Dict, Any
-from contextlib import contextmanager
+import bisect
+import asyncio
+import functools
+import queue
+import threading
+import time
+from typing import Optional, List, Dict, Any, Iterator
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor
+from .utils.metrics import metrics
+from .schema import apply_migrations, rebuild_leaderboard, rebuild_player_stats
+
+class ConnectionPool:
+    """Pool de conexões SQLite persistentes e reutilizáveis
+
+    As conexões são abertas sob demanda até o tamanho máximo e devolvidas ao pool
+    ao fim de cada uso. Quando todas estão ocupadas, quem pede uma conexão espera
+    até `timeout` segundos. Registra métricas de checkout e de tempo de espera.
+    """
+
+    def __init__(self, connect, size: int, timeout: float = 10.0):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+        
+        # Métricas
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def acquire(self) -> sqlite3.Connection:
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if len(self._all) < self.size:
+                    conn = self._connect()
+                    self._all.append(conn)
+        
+        waited = 0.0
+        if conn is None:
+            # Pool esgotado: espera alguma conexão ser devolvida
+            start = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self.timeouts += 1
+                raise sqlite3.OperationalError(
+                    f"Tempo esgotado aguardando conexão do pool ({self.timeout}s)"
+                )
+            waited = time.perf_counter() - start
+        
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            if waited:
+                self.waits += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+        return conn
+    
+    def release(self, conn: sqlite3.Connection):
+        # Nunca devolve ao pool uma conexão com transação pendente
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self.in_use -= 1
+        self._idle.put(conn)
+    
+    def close(self):
+        with self._lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            conn.close()
+        self._idle = queue.LifoQueue()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._all),
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.waits * 1000, 3) if self.waits else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+# Tipos de registro do log de respostas (coluna resposta.tipo)
+ANSWER = "resposta"
+TURING_USED = "turing"
+MEMORY_STICK_USED = "pente"
+
+# Limites superiores (ms) das faixas do histograma de tempo de resposta por questão.
+# Ficam gravados em estatistica_pergunta_tempo: só acrescente faixas, nunca altere as existentes.
+RESPONSE_TIME_BUCKETS_MS = (500, 1000, 1500, 2000, 3000, 4000, 5000, 7500, 10000, 15000, 20000, 30000, 60000)
+OVERFLOW_BUCKET_MS = 2**31 - 1
+
+def response_time_bucket(elapsed_ms: int) -> int:
+    """Limite superior da faixa do histograma em que o tempo cai"""
+    index = bisect.bisect_left(RESPONSE_TIME_BUCKETS_MS, elapsed_ms)
+    return RESPONSE_TIME_BUCKETS_MS[index] if index < len(RESPONSE_TIME_BUCKETS_MS) else OVERFLOW_BUCKET_MS
+
+def histogram_median(histogram: Dict[int, int]) -> Optional[float]:
+    """Mediana (em segundos) estimada do histograma {limite_ms: quantidade}, interpolando na faixa"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    half = total / 2
+    seen = 0
+    lower = 0
+    for upper in RESPONSE_TIME_BUCKETS_MS:
+        count = histogram.get(upper, 0)
+        if count and seen + count >= half:
+            return round((lower + (upper - lower) * (half - seen) / count) / 1000, 3)
+        seen += count
+        lower = upper
+    # Mediana na faixa aberta: o melhor limite conhecido é o início dela
+    return lower / 1000
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "compquest.db"):
+    def __init__(self, db_path: str = "compquest.db", pool_size: int = 0,
+                 pool_timeout: float = 10.0, busy_timeout_ms: int = 5000,
+                 synchronous: str = "NORMAL", cached_statements: int = 256):
+        """pool_size > 0 ativa o modo pool (conexões persistentes em WAL);
+        com pool_size = 0 cada uso abre e fecha sua própria conexão."""
         self.db_path = db_path
-        self.init_database()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self.pool = ConnectionPool(self._connect, pool_size, pool_timeout) if pool_size > 0 else None
+        # O schema é criado/migrado no primeiro uso, não na construção (importar o módulo não abre o banco)
+        self._initialized = False
+        self._init_lock = threading.RLock()
     
-    def init_database(self):
-        """Inicializa o banco de dados com todas as tabelas e restrições"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Habilita chaves estrangeiras
-            cursor.execute("PRAGMA foreign_keys = ON;")
-            
-            # Cria tabela categoria
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS categoria (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    dificuldade VARCHAR(10) NOT NULL UNIQUE,
-                    CHECK (dificuldade IN ('facil', 'medio', 'dificil'))
-                )
-            """)
-            
-            # Cria tabela pergunta
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pergunta (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    dica TEXT,
-                    explicacao TEXT,
-                    id_categoria INTEGER NOT NULL,
-                    FOREIGN KEY (id_categoria) REFERENCES categoria(id)
-                )
-            """)
-            
-            # Cria tabela alternativa
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alternativa (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    letra VARCHAR(1) NOT NULL,
-                    correta INTEGER NOT NULL DEFAULT 0,
-                    id_pergunta INTEGER NOT NULL,
-                    FOREIGN KEY (id_pergunta) REFERENCES pergunta(id),
-                    CHECK (letra IN ('A', 'B', 'C', 'D')),
-                    CHECK (correta IN (0, 1))
-                )
-            """)
-            
-            # Cria tabela jogador
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS jogador (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome VARCHAR(50) NOT NULL UNIQUE
-                )
-            """)
-            
-            # Cria tabela partida
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS partida (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    data TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Cria tabela joga (entidade associativa)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS joga (
-                    id_jogador INTEGER NOT NULL,
-                    id_partida INTEGER NOT NULL,
-                    score INTEGER NOT NULL DEFAULT 0,
-                    venceu INTEGER NOT NULL DEFAULT 0,
-                    PRIMARY KEY (id_jogador, id_partida),
-                    FOREIGN KEY (id_jogador) REFERENCES jogador(id),
-                    FOREIGN KEY (id_partida) REFERENCES partida(id),
-                    CHECK (venceu IN (0, 1)),
-                    CHECK (score >= 0)
-                )
-            """)
-            
-            # Cria tabela contem (entidade associativa)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS contem (
-                    id_partida INTEGER NOT NULL,
-                    id_pergunta INTEGER NOT NULL,
-                    PRIMARY KEY (id_partida, id_pergunta),
-                    FOREIGN KEY (id_partida) REFERENCES partida(id),
-                    FOREIGN KEY (id_pergunta) REFERENCES pergunta(id)
-                )
-            """)
-            
-            # Cria índices
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pergunta_categoria ON pergunta(id_categoria)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_alternativa_pergunta ON alternativa(id_pergunta)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_joga_jogador ON joga(id_jogador)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_joga_partida ON joga(id_partida)")
-            
-            conn.commit()
+    def init_database(self) -> List[int]:
+        """Aplica as migrações de schema pendentes; retorna as versões aplicadas
+        
+        Chamado automaticamente no primeiro uso de get_connection(). Num banco já
+        atualizado custa uma consulta a schema_version.
+        """
+        with self._init_lock:
+            # Usa uma conexão própria (fora do pool) para os PRAGMAs de inicialização não vazarem
+            with closing(self._connect()) as conn:
+                # Habilita chaves estrangeiras
+                conn.execute("PRAGMA foreign_keys = ON;")
+                
+                # WAL é persistente no arquivo: leitores não bloqueiam o escritor (e vice-versa)
+                if self.pool:
+                    conn.execute("PRAGMA journal_mode = WAL;")
+                
+                applied = apply_migrations(conn)
+            self._initialized = True
+        return applied
+    
+    def _ensure_initialized(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.init_database()
+    
+    def _connect(self, check_same_thread: Optional[bool] = None) -> sqlite3.Connection:
+        """Abre uma conexão já configurada com os PRAGMAs por conexão"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=self.pool is None if check_same_thread is None else check_same_thread
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if self.pool:
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
     
     @contextmanager
     def get_connection(self):
         """Gerenciador de contexto para conexões com o banco de dados"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        self._ensure_initialized()
+        if self.pool:
+            conn = self.pool.acquire()
+            try:
+                yield conn
+            finally:
+                self.pool.release(conn)
+            return
+        
+        conn = self._connect()
         try:
             yield conn
         finally:
             conn.close()
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Métricas do pool de conexões (checkouts, esperas e conexões em uso)"""
+        if not self.pool:
+            return {"mode": "direct"}
+        return {"mode": "pool", **self.pool.stats()}
+    
+    def close(self):
+        """Fecha as conexões persistentes do pool"""
+        if self.pool:
+            self.pool.close()
+    
     def get_or_create_player(self, player_name: str) -> int:
         """Obtém ID do jogador ou cria se não existir"""
         with self.get_connection() as conn:
@@ -140,12 +242,56 @@ class DatabaseManager:
         """Salva resultado do jogador para uma partida"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO joga (id_jogador, id_partida, score, venceu)
-                VALUES (?, ?, ?, ?)
-            """, (player_id, match_id, score, 1 if won else 0))
+            self._save_results(cursor, [(player_id, match_id, score, 1 if won else 0)])
             conn.commit()
     
+    def _save_results(self, cursor, results: List[tuple], new_matches: bool = False):
+        """Grava linhas (id_jogador, id_partida, score, venceu) em joga e atualiza o
+        ranking e os totais de cada jogador
+        
+        Deve rodar na transação de quem chama. Como joga usa INSERT OR REPLACE, um
+        resultado regravado entra nos totais só pela diferença para a linha antiga,
+        e se o score baixou o melhor score do jogador é recalculado (pelo índice de
+        joga por jogador). Com new_matches=True (partidas recém-criadas) não há
+        linhas a substituir.
+        """
+        replaced = []
+        deltas = []
+        for player_id, match_id, score, won in results:
+            old = None
+            if not new_matches:
+                cursor.execute(
+                    "SELECT score, venceu FROM joga WHERE id_jogador = ? AND id_partida = ?", (player_id, match_id)
+                )
+                old = cursor.fetchone()
+            if old is None:
+                deltas.append((player_id, 1, score, won))
+            else:
+                deltas.append((player_id, 0, score - old[0], won - old[1]))
+                if old[0] > score:
+                    replaced.append(player_id)
+        
+        cursor.executemany(
+            "INSERT OR REPLACE INTO joga (id_jogador, id_partida, score, venceu) VALUES (?, ?, ?, ?)",
+            results
+        )
+        cursor.executemany("""
+            INSERT INTO estatistica_jogador (id_jogador, partidas, score_total, vitorias) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id_jogador) DO UPDATE SET
+                partidas = partidas + excluded.partidas,
+                score_total = score_total + excluded.score_total,
+                vitorias = vitorias + excluded.vitorias
+        """, deltas)
+        cursor.executemany("""
+            INSERT INTO ranking (id_jogador, melhor_score) VALUES (?, ?)
+            ON CONFLICT(id_jogador) DO UPDATE SET melhor_score = MAX(melhor_score, excluded.melhor_score)
+        """, [(player_id, score) for player_id, _, score, _ in results])
+        if replaced:
+            cursor.executemany("""
+                UPDATE ranking SET melhor_score = (SELECT MAX(score) FROM joga WHERE id_jogador = ?)
+                WHERE id_jogador = ?
+            """, [(player_id, player_id) for player_id in set(replaced)])
+    
     def add_questions_to_match(self, match_id: int, question_ids: List[int]):
         """Adiciona questões usadas em uma partida"""
         with self.get_connection() as conn:
@@ -157,8 +303,177 @@ class DatabaseManager:
                 """, (match_id, question_id))
             conn.commit()
     
+    def save_finished_matches(self, matches: List[Dict[str, Any]]) -> List[int]:
+        """Grava um lote de partidas finalizadas numa única transação
+        
+        Cada item tem 'date' (UTC, 'YYYY-MM-DD HH:MM:SS'), 'question_ids' e
+        'results' (lista de (nome do jogador, score, venceu)). Retorna os IDs
+        das partidas criadas, na mesma ordem.
+        """
+        if not matches:
+            return []
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                player_ids = self._resolve_player_ids(
+                    cursor, {name for match in matches for name, _, _ in match['results']}
+                )
+                
+                # Reserva um bloco contíguo de IDs de partida (respeitando o AUTOINCREMENT)
+                cursor.execute("""
+                    SELECT MAX(
+                        COALESCE((SELECT MAX(id) FROM partida), 0),
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'partida'), 0)
+                    )
+                """)
+                first_id = cursor.fetchone()[0] + 1
+                match_ids = list(range(first_id, first_id + len(matches)))
+                
+                cursor.executemany(
+                    "INSERT INTO partida (id, data) VALUES (?, ?)",
+                    [(match_id, match['date']) for match_id, match in zip(match_ids, matches)]
+                )
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO contem (id_partida, id_pergunta) VALUES (?, ?)",
+                    [(match_id, question_id)
+                     for match_id, match in zip(match_ids, matches)
+                     for question_id in match['question_ids']]
+                )
+                self._save_results(cursor, [
+                    (player_ids[name], match_id, score, 1 if won else 0)
+                    for match_id, match in zip(match_ids, matches)
+                    for name, score, won in match['results']
+                ], new_matches=True)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            
+            return match_ids
+    
+    def _resolve_player_ids(self, cursor, names) -> Dict[str, int]:
+        """Jogadores: cria os que faltam e resolve todos os IDs de uma vez"""
+        names = list(names)
+        cursor.executemany("INSERT OR IGNORE INTO jogador (nome) VALUES (?)", [(name,) for name in names])
+        player_ids = {}
+        for start in range(0, len(names), self._IN_BATCH_SIZE):
+            batch = names[start:start + self._IN_BATCH_SIZE]
+            cursor.execute(
+                f"SELECT id, nome FROM jogador WHERE nome IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            player_ids.update({row['nome']: row['id'] for row in cursor})
+        return player_ids
+    
+    def save_answers(self, answers: List[tuple]):
+        """Grava um lote do log de respostas e soma os agregados por questão numa única transação
+        
+        Cada item é (sessão, id da questão, nome do jogador, tipo, correta, tempo em
+        ms, índice da questão na partida, instante em segundos desde a época), com tipo
+        'resposta', 'turing' ou 'pente' (correta é None no pente). Acurácia, tempo
+        médio e histograma de tempo contam só as respostas comuns.
+        """
+        if not answers:
+            return
+        
+        totals: Dict[int, List[int]] = {}
+        buckets: Dict[tuple, int] = {}
+        for _, question_id, _, kind, correct, elapsed_ms, _, _ in answers:
+            total = totals.setdefault(question_id, [0, 0, 0, 0, 0])
+            if kind == ANSWER:
+                total[0] += 1
+                total[1] += 1 if correct else 0
+                total[4] += elapsed_ms
+                key = (question_id, response_time_bucket(elapsed_ms))
+                buckets[key] = buckets.get(key, 0) + 1
+            elif kind == TURING_USED:
+                total[2] += 1
+            else:
+                total[3] += 1
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                player_ids = self._resolve_player_ids(cursor, {answer[2] for answer in answers})
+                cursor.executemany("""
+                    INSERT INTO resposta (sessao, id_pergunta, id_jogador, tipo, correta, tempo_ms, indice, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (session_id, question_id, player_ids[name], kind, None if correct is None else int(correct),
+                     elapsed_ms, index, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)))
+                    for session_id, question_id, name, kind, correct, elapsed_ms, index, timestamp in answers
+                ])
+                cursor.executemany("""
+                    INSERT INTO estatistica_pergunta (id_pergunta, respostas, acertos, turing, pente, tempo_total_ms)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id_pergunta) DO UPDATE SET
+                        respostas = respostas + excluded.respostas,
+                        acertos = acertos + excluded.acertos,
+                        turing = turing + excluded.turing,
+                        pente = pente + excluded.pente,
+                        tempo_total_ms = tempo_total_ms + excluded.tempo_total_ms
+                """, [(question_id, *total) for question_id, total in totals.items()])
+                cursor.executemany("""
+                    INSERT INTO estatistica_pergunta_tempo (id_pergunta, limite_ms, quantidade) VALUES (?, ?, ?)
+                    ON CONFLICT(id_pergunta, limite_ms) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+                """, [(question_id, limit_ms, count) for (question_id, limit_ms), count in buckets.items()])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    def get_question_stats(self, question_ids: List[int] = None, limit: int = 20,
+                           min_answers: int = 1) -> List[Dict[str, Any]]:
+        """Agregados por questão (acurácia, tempos médio e mediano, poderes usados)
+        
+        Sem question_ids devolve as `limit` questões de menor acurácia entre as com
+        pelo menos `min_answers` respostas. A mediana é estimada do histograma.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            columns = "id_pergunta, respostas, acertos, turing, pente, tempo_total_ms"
+            if question_ids is not None:
+                question_ids = list(question_ids)[:self._IN_BATCH_SIZE]
+                cursor.execute(
+                    f"SELECT {columns} FROM estatistica_pergunta WHERE id_pergunta IN ({','.join('?' * len(question_ids))})",
+                    question_ids
+                )
+            else:
+                cursor.execute(f"""
+                    SELECT {columns} FROM estatistica_pergunta
+                    WHERE respostas >= ?
+                    ORDER BY CAST(acertos AS REAL) / respostas, respostas DESC
+                    LIMIT ?
+                """, (max(min_answers, 1), limit))
+            rows = cursor.fetchall()
+            if not rows:
+                return []
+            
+            ids = [row['id_pergunta'] for row in rows]
+            cursor.execute(f"""
+                SELECT id_pergunta, limite_ms, quantidade FROM estatistica_pergunta_tempo
+                WHERE id_pergunta IN ({','.join('?' * len(ids))})
+            """, ids)
+            histograms: Dict[int, Dict[int, int]] = {}
+            for question_id, limit_ms, count in cursor:
+                histograms.setdefault(question_id, {})[limit_ms] = count
+            
+            return [{
+                'question_id': row['id_pergunta'],
+                'answers': row['respostas'],
+                'correct': row['acertos'],
+                'accuracy': round(row['acertos'] / row['respostas'], 4) if row['respostas'] else None,
+                'avg_response_time': round(row['tempo_total_ms'] / row['respostas'] / 1000, 3) if row['respostas'] else None,
+                'median_response_time': histogram_median(histograms.get(row['id_pergunta'], {})),
+                'turing_used': row['turing'],
+                'memory_stick_used': row['pente']
+            } for row in rows]
+    
     def get_questions_by_difficulty(self, difficulty: str, limit: int = None) -> List[Dict[str, Any]]:
-        """Obtém questões por nível de dificuldade"""
+        """Obtém questões ativas por nível de dificuldade"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -166,47 +481,34 @@ class DatabaseManager:
                 SELECT p.id, p.nome, p.dica, p.explicacao, c.dificuldade
                 FROM pergunta p
                 JOIN categoria c ON p.id_categoria = c.id
-                WHERE c.dificuldade = ?
+                WHERE c.dificuldade = ? AND p.ativa = 1
                 ORDER BY RANDOM()
             """
             
             if limit:
                 query += " LIMIT ?"
                 cursor.execute(query, (difficulty, limit))
+                rows = cursor.fetchall()
+                # Poucas questões: busca só as alternativas delas em lotes com IN
+                alternatives = self._fetch_alternatives(cursor, [row['id'] for row in rows])
             else:
                 cursor.execute(query, (difficulty,))
-            
-            questions = []
-            for row in cursor.fetchall():
-                # Obtém alternativas para esta questão
+                rows = cursor.fetchall()
+                # Todas as questões da dificuldade: uma única consulta com JOIN
                 cursor.execute("""
-                    SELECT nome, letra, correta
-                    FROM alternativa
-                    WHERE id_pergunta = ?
-                    ORDER BY letra
-                """, (row['id'],))
-                
-                alternatives = []
-                for alt_row in cursor.fetchall():
-                    alternatives.append({
-                        'text': alt_row['nome'],
-                        'letter': alt_row['letra'],
-                        'correct': bool(alt_row['correta'])
-                    })
-                
-                questions.append({
-                    'id': row['id'],
-                    'question': row['nome'],
-                    'hint': row['dica'] or '',
-                    'explanation': row['explicacao'] or '',
-                    'difficulty': row['dificuldade'],
-                    'options': alternatives
-                })
+                    SELECT a.id_pergunta, a.nome, a.letra, a.correta
+                    FROM alternativa a
+                    JOIN pergunta p ON a.id_pergunta = p.id
+                    JOIN categoria c ON p.id_categoria = c.id
+                    WHERE c.dificuldade = ? AND p.ativa = 1
+                    ORDER BY a.id_pergunta, a.letra
+                """, (difficulty,))
+                alternatives = self._group_alternatives(cursor)
             
-            return questions
+            return [self._build_question(row, alternatives.get(row['id'], [])) for row in rows]
     
     def get_all_questions(self) -> List[Dict[str, Any]]:
-        """Obtém todas as questões com suas alternativas"""
+        """Obtém todas as questões ativas com suas alternativas"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -214,90 +516,243 @@ class DatabaseManager:
                 SELECT p.id, p.nome, p.dica, p.explicacao, c.dificuldade
                 FROM pergunta p
                 JOIN categoria c ON p.id_categoria = c.id
+                WHERE p.ativa = 1
                 ORDER BY c.dificuldade, p.id
             """)
+            rows = cursor.fetchall()
             
-            questions = []
-            for row in cursor.fetchall():
-                # Obtém alternativas para esta questão
-                cursor.execute("""
-                    SELECT nome, letra, correta
-                    FROM alternativa
-                    WHERE id_pergunta = ?
-                    ORDER BY letra
-                """, (row['id'],))
-                
-                alternatives = []
-                for alt_row in cursor.fetchall():
-                    alternatives.append({
-                        'text': alt_row['nome'],
-                        'letter': alt_row['letra'],
-                        'correct': bool(alt_row['correta'])
-                    })
-                
-                questions.append({
-                    'id': row['id'],
-                    'question': row['nome'],
-                    'hint': row['dica'] or '',
-                    'explanation': row['explicacao'] or '',
-                    'difficulty': row['dificuldade'],
-                    'options': alternatives
-                })
+            cursor.execute("""
+                SELECT a.id_pergunta, a.nome, a.letra, a.correta
+                FROM alternativa a
+                JOIN pergunta p ON a.id_pergunta = p.id
+                WHERE p.ativa = 1
+                ORDER BY a.id_pergunta, a.letra
+            """)
+            alternatives = self._group_alternatives(cursor)
             
-            return questions
+            return [self._build_question(row, alternatives.get(row['id'], [])) for row in rows]
+    
+    # Limite seguro de parâmetros por consulta (SQLite antigo aceita no máximo 999)
+    _IN_BATCH_SIZE = 500
+    
+    def _fetch_alternatives(self, cursor, question_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Busca as alternativas de várias questões em lotes com IN, agrupadas por questão"""
+        alternatives: Dict[int, List[Dict[str, Any]]] = {}
+        for start in range(0, len(question_ids), self._IN_BATCH_SIZE):
+            batch = question_ids[start:start + self._IN_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(f"""
+                SELECT id_pergunta, nome, letra, correta
+                FROM alternativa
+                WHERE id_pergunta IN ({placeholders})
+                ORDER BY id_pergunta, letra
+            """, batch)
+            for question_id, options in self._group_alternatives(cursor).items():
+                alternatives[question_id] = options
+        return alternatives
+    
+    @staticmethod
+    def _group_alternatives(cursor) -> Dict[int, List[Dict[str, Any]]]:
+        """Agrupa em Python as linhas de alternativa (id_pergunta, nome, letra, correta) por questão"""
+        alternatives: Dict[int, List[Dict[str, Any]]] = {}
+        for question_id, text, letter, correct in cursor:
+            alternatives.setdefault(question_id, []).append({
+                'text': text,
+                'letter': letter,
+                'correct': bool(correct)
+            })
+        return alternatives
+    
+    @staticmethod
+    def _build_question(row, alternatives: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'question': row['nome'],
+            'hint': row['dica'] or '',
+            'explanation': row['explicacao'] or '',
+            'difficulty': row['dificuldade'],
+            'options': alternatives
+        }
     
     def get_player_stats(self, player_name: str) -> Dict[str, Any]:
-        """Obtém estatísticas do jogador"""
+        """Obtém estatísticas do jogador (totais mantidos; não cria jogadores desconhecidos)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Obtém ID do jogador
-            player_id = self.get_or_create_player(player_name)
-            
-            # Obtém estatísticas de partidas
             cursor.execute("""
                 SELECT 
-                    COUNT(*) as total_matches,
-                    SUM(score) as total_score,
-                    AVG(score) as avg_score,
-                    SUM(venceu) as wins,
-                    MAX(score) as best_score
-                FROM joga
-                WHERE id_jogador = ?
-            """, (player_id,))
+                    COALESCE(e.partidas, 0),
+                    COALESCE(e.score_total, 0),
+                    COALESCE(e.vitorias, 0),
+                    COALESCE(r.melhor_score, 0)
+                FROM jogador jg
+                LEFT JOIN estatistica_jogador e ON e.id_jogador = jg.id
+                LEFT JOIN ranking r ON r.id_jogador = jg.id
+                WHERE jg.nome = ?
+            """, (player_name,))
             
-            stats = cursor.fetchone()
+            # Jogador desconhecido: estatísticas zeradas
+            total_matches, total_score, wins, best_score = cursor.fetchone() or (0, 0, 0, 0)
             
             return {
                 'player_name': player_name,
-                'total_matches': stats['total_matches'] or 0,
-                'total_score': stats['total_score'] or 0,
-                'avg_score': round(stats['avg_score'] or 0, 2),
-                'wins': stats['wins'] or 0,
-                'best_score': stats['best_score'] or 0
+                'total_matches': total_matches,
+                'total_score': total_score,
+                'avg_score': round(total_score / total_matches, 2) if total_matches else 0,
+                'wins': wins,
+                'best_score': best_score
             }
     
-    def has_questions(self) -> bool:
-        """Verifica se o banco de dados possui questões"""
+    def get_seen_question_ids(self, player_name: str) -> List[int]:
+        """IDs das questões de todas as partidas do jogador (contem ⨝ joga)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) as count FROM pergunta")
+            cursor.execute("""
+                SELECT DISTINCT c.id_pergunta
+                FROM jogador jg
+                JOIN joga j ON j.id_jogador = jg.id
+                JOIN contem c ON c.id_partida = j.id_partida
+                WHERE jg.nome = ?
+            """, (player_name,))
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_match_date(self, match_id: int) -> Optional[str]:
+        """Obtém a data de uma partida"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT data FROM partida WHERE id = ?", (match_id,))
             result = cursor.fetchone()
-            return result['count'] > 0 if result else False
+            return result['data'] if result else None
+    
+    def get_recent_scores(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Obtém os resultados das partidas mais recentes"""
+        return self.get_score_page(limit)['scores']
+    
+    def get_score_page(self, limit: int = 50, after: Optional[tuple] = None, player_name: str = None,
+                       date_from: str = None, date_to: str = None) -> Dict[str, Any]:
+        """Uma página do histórico de resultados, da partida mais recente para a mais antiga
+        
+        Paginação por chave (keyset): `after` é o next_key da página anterior,
+        (data, id da partida, id do jogador), e a consulta continua do ponto em
+        que parou no índice de partida(data, id), então qualquer página custa o
+        mesmo que a primeira. Filtros opcionais: nome do jogador e intervalo de
+        datas [date_from, date_to) no formato de partida.data. Retorna
+        {'scores': [...], 'next_key': tupla ou None se não houver mais páginas}.
+        """
+        conditions = []
+        params: List[Any] = []
+        if player_name is not None:
+            conditions.append("jg.nome = ?")
+            params.append(player_name)
+        if date_from is not None:
+            conditions.append("p.data >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("p.data < ?")
+            params.append(date_to)
+        if after is not None:
+            # A primeira condição delimita o intervalo no índice; a segunda desempata dentro da partida
+            after_date, after_match, after_player = after
+            conditions.append("(p.data, p.id) <= (?, ?) AND (p.data, p.id, j.id_jogador) < (?, ?, ?)")
+            params += [after_date, after_match, after_date, after_match, after_player]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        if player_name is not None:
+            # Partidas de um jogador: parte do jogador (índice único do nome) e ordena só as dele
+            tables = "jogador jg JOIN joga j ON j.id_jogador = jg.id JOIN partida p ON j.id_partida = p.id"
+        else:
+            # CROSS JOIN fixa a ordem: percorre partida pelo índice (data, id) e para no LIMIT
+            tables = "partida p CROSS JOIN joga j ON j.id_partida = p.id CROSS JOIN jogador jg ON j.id_jogador = jg.id"
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT jg.nome, j.score, j.venceu, p.data, p.id as match_id, j.id_jogador
+                FROM {tables}
+                {where}
+                ORDER BY p.data DESC, p.id DESC, j.id_jogador DESC
+                LIMIT ?
+            """, params + [limit + 1])
+            rows = cursor.fetchall()
+            
+            scores = [{
+                "player_name": row['nome'],
+                "score": row['score'],
+                "won": bool(row['venceu']),
+                "date": row['data'],
+                "match_id": row['match_id']
+            } for row in rows[:limit]]
+            
+            next_key = None
+            if len(rows) > limit:
+                last = rows[limit - 1]
+                next_key = (last['data'], last['match_id'], last['id_jogador'])
+            
+            return {'scores': scores, 'next_key': next_key}
+    
+    def iter_match_rows(self, batch_size: int = 1000, date_from: str = None,
+                        date_to: str = None) -> Iterator[List[sqlite3.Row]]:
+        """Percorre o histórico completo (partida ⨝ joga ⨝ jogador, com as questões de contem) em lotes
+        
+        Gerador para exportação: usa uma conexão própria, somente leitura e fora
+        do pool, então uma exportação longa não ocupa conexões do jogo (em WAL a
+        leitura também não bloqueia as gravações). As linhas saem em ordem
+        cronológica pelo índice de partida(data, id) e são lidas com fetchmany,
+        `batch_size` por vez, então a memória não cresce com o tamanho do banco.
+        Cada linha tem match_id, data, nome, score, venceu e perguntas (IDs
+        separados por espaço). A conexão é fechada quando o gerador termina ou é
+        descartado; pode ser consumido de threads diferentes.
+        """
+        self._ensure_initialized()
+        conditions = []
+        params: List[Any] = []
+        if date_from is not None:
+            conditions.append("p.data >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("p.data < ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        conn = self._connect(check_same_thread=False)
+        try:
+            conn.execute("PRAGMA query_only = ON")
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT p.id as match_id, p.data, jg.nome, j.score, j.venceu,
+                    (SELECT group_concat(c.id_pergunta, ' ') FROM contem c WHERE c.id_partida = p.id) as perguntas
+                FROM partida p
+                CROSS JOIN joga j ON j.id_partida = p.id
+                CROSS JOIN jogador jg ON j.id_jogador = jg.id
+                {where}
+                ORDER BY p.data, p.id
+            """, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+    
+    def has_questions(self) -> bool:
+        """Verifica se o banco de dados possui questões ativas"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM pergunta WHERE ativa = 1)")
+            return bool(cursor.fetchone()[0])
     
     def get_top_players(self, limit: int = 3) -> List[Dict[str, Any]]:
-        """Obtém os melhores jogadores por pontuação máxima"""
+        """Obtém os melhores jogadores por pontuação máxima (leitura do índice do ranking)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 SELECT 
                     jg.nome,
-                    MAX(j.score) as max_score
-                FROM joga j
-                JOIN jogador jg ON j.id_jogador = jg.id
-                GROUP BY j.id_jogador, jg.nome
-                ORDER BY max_score DESC
+                    r.melhor_score as max_score
+                FROM ranking r
+                JOIN jogador jg ON r.id_jogador = jg.id
+                ORDER BY r.melhor_score DESC
                 LIMIT ?
             """, (limit,))
             
@@ -309,6 +764,137 @@ class DatabaseManager:
                 })
             
             return players
+    
+    def rebuild_leaderboard(self) -> int:
+        """Recalcula o ranking inteiro a partir de joga; retorna o número de jogadores"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                count = rebuild_leaderboard(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return count
+    
+    def rebuild_player_stats(self) -> int:
+        """Recalcula os totais de todos os jogadores a partir de joga; retorna o número de jogadores"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                count = rebuild_player_stats(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return count
+    
+    def check_player_stats(self) -> List[Dict[str, Any]]:
+        """Compara os totais mantidos com os recalculados de joga; retorna as divergências"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                WITH esperado AS (
+                    SELECT id_jogador, COUNT(*) AS partidas, SUM(score) AS score_total, SUM(venceu) AS vitorias
+                    FROM joga GROUP BY id_jogador
+                )
+                SELECT e.id_jogador,
+                       e.partidas || '/' || e.score_total || '/' || e.vitorias AS expected,
+                       s.partidas || '/' || s.score_total || '/' || s.vitorias AS actual
+                FROM esperado e
+                LEFT JOIN estatistica_jogador s ON s.id_jogador = e.id_jogador
+                WHERE s.partidas IS NOT e.partidas OR s.score_total IS NOT e.score_total OR s.vitorias IS NOT e.vitorias
+                UNION ALL
+                SELECT s.id_jogador, NULL, s.partidas || '/' || s.score_total || '/' || s.vitorias
+                FROM estatistica_jogador s
+                WHERE s.id_jogador NOT IN (SELECT id_jogador FROM esperado)
+            """)
+            return [
+                {'player_id': row['id_jogador'], 'expected': row['expected'], 'actual': row['actual']}
+                for row in cursor.fetchall()
+            ]
+    
+    def check_leaderboard(self) -> List[Dict[str, Any]]:
+        """Compara o ranking com o MAX(score) calculado de joga; retorna as divergências"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                WITH esperado AS (
+                    SELECT id_jogador, MAX(score) AS melhor_score FROM joga GROUP BY id_jogador
+                )
+                SELECT e.id_jogador, e.melhor_score AS expected, r.melhor_score AS actual
+                FROM esperado e
+                LEFT JOIN ranking r ON r.id_jogador = e.id_jogador
+                WHERE r.melhor_score IS NOT e.melhor_score
+                UNION ALL
+                SELECT r.id_jogador, NULL, r.melhor_score
+                FROM ranking r
+                WHERE r.id_jogador NOT IN (SELECT id_jogador FROM esperado)
+            """)
+            return [
+                {'player_id': row['id_jogador'], 'expected': row['expected'], 'actual': row['actual']}
+                for row in cursor.fetchall()
+            ]
 
 # Instância global do gerenciador de banco de dados
-db_manager = DatabaseManager()
+db_manager = DatabaseManager(
+    db_path=os.getenv("COMPQUEST_DB_PATH", "compquest.db"),
+    pool_size=int(os.getenv("COMPQUEST_DB_POOL_SIZE", "5")),
+    pool_timeout=float(os.getenv("COMPQUEST_DB_POOL_TIMEOUT", "10")),
+    busy_timeout_ms=int(os.getenv("COMPQUEST_DB_BUSY_TIMEOUT_MS", "5000"))
+)
+
+
+class AsyncDatabaseManager:
+    """Fachada assíncrona do DatabaseManager
+
+    Expõe os mesmos métodos do DatabaseManager como awaitables, executados num
+    executor dedicado e limitado, para que chamadas bloqueantes ao SQLite nunca
+    rodem no event loop. Ex.: `await async_db_manager.get_top_players(3)`.
+    """
+
+    def __init__(self, manager: DatabaseManager, max_workers: int):
+        self._manager = manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compquest-db")
+        self._latency = metrics.histogram(
+            "compquest_db_call_seconds",
+            "Latência das chamadas ao banco vistas pelo event loop (inclui a espera no executor)",
+            label="method"
+        )
+    
+    async def run(self, fn, *args, **kwargs):
+        """Executa qualquer função bloqueante no executor do banco de dados"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._latency.labels(getattr(fn, "__name__", "call")).observe(time.perf_counter() - start)
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._manager, name)
+        if not callable(method):
+            return method
+        
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+    
+    def shutdown(self):
+        """Aguarda as chamadas pendentes e encerra o executor"""
+        self._executor.shutdown(wait=True)
+
+# Mesmo número de threads que conexões no pool: nenhuma thread espera por conexão
+async_db_manager = AsyncDatabaseManager(db_manager, max_workers=db_manager.pool.size if db_manager.pool else 4)
+def _pool_metric(key: str):
+    return lambda: db_manager.pool.stats()[key] if db_manager.pool else 0
+
+metrics.gauge("compquest_db_pool_in_use", "Conexões do pool em uso", _pool_metric("in_use"))
+metrics.counter("compquest_db_pool_checkouts_total", "Conexões retiradas do pool", _pool_metric("checkouts"))
+metrics.counter("compquest_db_pool_waits_total", "Retiradas que precisaram esperar por uma conexão livre", _pool_metric("waits"))
+metrics.counter("compquest_db_pool_timeouts_total", "Retiradas que esgotaram o tempo de espera", _pool_metric("timeouts"))
@@ -0,0 +1,35 @@
+import sys
+from .database import db_manager
+
+def rebuild():
+    """Recalcula o ranking e os totais por jogador a partir de todos os resultados em joga"""
+    count = db_manager.rebuild_leaderboard()
+    print(f"Ranking reconstruído: {count} jogadores")
+    count = db_manager.rebuild_player_stats()
+    print(f"Estatísticas por jogador reconstruídas: {count} jogadores")
+
+def check() -> bool:
+    """Confere o ranking e os totais por jogador contra os valores recalculados de joga"""
+    consistent = True
+    for label, mismatches in (
+        ("Ranking", db_manager.check_leaderboard()),
+        ("Estatísticas por jogador", db_manager.check_player_stats())
+    ):
+        if not mismatches:
+            print(f"{label}: consistente com joga")
+            continue
+        consistent = False
+        print(f"{label}: {len(mismatches)} jogadores divergentes")
+        for mismatch in mismatches[:20]:
+            print(f"  jogador {mismatch['player_id']}: esperado {mismatch['expected']}, mantido {mismatch['actual']}")
+    return consistent
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "rebuild":
+        rebuild()
+    elif command == "check":
+        sys.exit(0 if check() else 1)
+    else:
+        print("Uso: python -m app.leaderboard [rebuild|check]")
+        sys.exit(2)
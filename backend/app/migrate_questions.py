@@ -1,68 +1,148 @@
+from typing import Any, Dict, List
+import hashlib
 import json
 import os
-from .database import db_manager
+from .database import db_manager, DatabaseManager
+from .utils.logger import get_logger, setup_logging, stop_logging
 
-def migrate_questions():
-    """Migra questões do JSON para o banco de dados SQLite"""
-    
-    json_path = os.path.join(os.path.dirname(__file__), 'data', 'questions.json')
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        questions_data = json.load(f)
-    
-    with db_manager.get_connection() as conn:
+logger = get_logger("db")
+
+JSON_PATH = os.path.join(os.path.dirname(__file__), 'data', 'questions.json')
+
+CATEGORIES = {
+    'facil': 1,
+    'medio': 2,
+    'dificil': 3
+}
+
+DIFFICULTY_MAPPING = {
+    'easy_questions': 'facil',
+    'medium_questions': 'medio',
+    'hard_questions': 'dificil'
+}
+
+def question_hash(difficulty: str, question_data: Dict[str, Any]) -> str:
+    """Hash do conteúdo de uma questão (tudo o que vai para pergunta e alternativa)"""
+    # Campos separados por \x1f (separador de unidade), que não aparece no texto das questões
+    content = "\x1f".join([
+        difficulty,
+        question_data['question'],
+        question_data.get('oracle_hint', ''),
+        question_data.get('explanation', ''),
+        question_data['answer'],
+        *question_data['options']
+    ])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _alternative_rows(question_id: int, question_data: Dict[str, Any]) -> List[tuple]:
+    correct_answer = question_data['answer']
+    return [
+        (option, chr(ord('A') + i), 1 if option == correct_answer else 0, question_id)
+        for i, option in enumerate(question_data['options'])
+    ]
+
+def sync_questions(manager: DatabaseManager, questions_data: Dict[str, Any]) -> Dict[str, int]:
+    """Sincroniza as questões do banco com o conteúdo do JSON, de forma incremental
+
+    A questão é identificada pelo texto: questões novas são inseridas, as que
+    mudaram (hash do conteúdo diferente) são atualizadas no mesmo ID e têm as
+    alternativas regravadas, e as que saíram do JSON são desativadas (ativa = 0)
+    em vez de apagadas, preservando o histórico em contem. Tudo roda numa única
+    transação com executemany. Retorna a contagem de cada operação.
+    """
+    incoming: Dict[str, tuple] = {}
+    for json_key, difficulty in DIFFICULTY_MAPPING.items():
+        for question_data in questions_data.get(json_key, []):
+            if question_data['question'] in incoming:
+                logger.warning("Questão duplicada no JSON (mantida a última): %.60s", question_data['question'])
+            incoming[question_data['question']] = (difficulty, question_data, question_hash(difficulty, question_data))
+
+    with manager.get_connection() as conn:
         cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM alternativa")
-        cursor.execute("DELETE FROM pergunta")
-        cursor.execute("DELETE FROM categoria")
-        
-        categories = {
-            'facil': 1,
-            'medio': 2,
-            'dificil': 3
-        }
-        
-        for difficulty, cat_id in categories.items():
-            cursor.execute("INSERT INTO categoria (id, dificuldade) VALUES (?, ?)", (cat_id, difficulty))
-        
-        difficulty_mapping = {
-            'easy_questions': 'facil',
-            'medium_questions': 'medio',
-            'hard_questions': 'dificil'
-        }
-        
-        for json_key, difficulty in difficulty_mapping.items():
-            questions = questions_data.get(json_key, [])
-            
-            for question_data in questions:
-                cursor.execute("""
-                    INSERT INTO pergunta (nome, dica, explicacao, id_categoria)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    question_data['question'],
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO categoria (id, dificuldade) VALUES (?, ?)",
+                [(cat_id, difficulty) for difficulty, cat_id in CATEGORIES.items()]
+            )
+
+            cursor.execute("SELECT id, nome, hash, ativa FROM pergunta")
+            existing = {row[1]: (row[0], row[2], row[3]) for row in cursor.fetchall()}
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM pergunta")
+            next_id = cursor.fetchone()[0] + 1
+
+            inserted, updated, reactivated = [], [], []
+            rewritten = []  # (id, questão) das questões novas e alteradas, cujas alternativas são regravadas
+            for text, (difficulty, question_data, digest) in incoming.items():
+                current = existing.get(text)
+                row = (
                     question_data.get('oracle_hint', ''),
                     question_data.get('explanation', ''),
-                    categories[difficulty]
-                ))
-                
-                question_id = cursor.lastrowid
-                
-                # Insere alternativas
-                correct_answer = question_data['answer']
-                options = question_data['options']
-                
-                for i, option in enumerate(options):
-                    letter = chr(ord('A') + i)
-                    is_correct = 1 if option == correct_answer else 0
-                    
-                    cursor.execute("""
-                        INSERT INTO alternativa (nome, letra, correta, id_pergunta)
-                        VALUES (?, ?, ?, ?)
-                    """, (option, letter, is_correct, question_id))
-        
-        conn.commit()
-        print("Questões migradas com sucesso!")
+                    CATEGORIES[difficulty],
+                    digest
+                )
+                if current is None:
+                    inserted.append((next_id, text) + row)
+                    rewritten.append((next_id, question_data))
+                    next_id += 1
+                elif current[1] != digest:
+                    updated.append(row + (current[0],))
+                    rewritten.append((current[0], question_data))
+                elif not current[2]:
+                    reactivated.append((current[0],))
+            retired = [
+                (question_id,) for text, (question_id, _, active) in existing.items()
+                if active and text not in incoming
+            ]
+
+            cursor.executemany("""
+                INSERT INTO pergunta (id, nome, dica, explicacao, id_categoria, hash, ativa)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+            """, inserted)
+            cursor.executemany("""
+                UPDATE pergunta SET dica = ?, explicacao = ?, id_categoria = ?, hash = ?, ativa = 1
+                WHERE id = ?
+            """, updated)
+            cursor.executemany("UPDATE pergunta SET ativa = 1 WHERE id = ?", reactivated)
+            cursor.executemany("UPDATE pergunta SET ativa = 0 WHERE id = ?", retired)
+
+            cursor.executemany("DELETE FROM alternativa WHERE id_pergunta = ?", [(row[-1],) for row in updated])
+            cursor.executemany("""
+                INSERT INTO alternativa (nome, letra, correta, id_pergunta)
+                VALUES (?, ?, ?, ?)
+            """, [
+                alternative
+                for question_id, question_data in rewritten
+                for alternative in _alternative_rows(question_id, question_data)
+            ])
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return {
+        'inserted': len(inserted),
+        'updated': len(updated),
+        'reactivated': len(reactivated),
+        'retired': len(retired),
+        'unchanged': len(incoming) - len(inserted) - len(updated) - len(reactivated)
+    }
+
+def migrate_questions(json_path: str = JSON_PATH, manager: DatabaseManager = db_manager) -> Dict[str, int]:
+    """Migra questões do JSON para o banco de dados SQLite (sincronização incremental)"""
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        questions_data = json.load(f)
+
+    summary = sync_questions(manager, questions_data)
+    logger.info(
+        "Questões migradas com sucesso! %d novas, %d atualizadas, %d reativadas, %d desativadas, %d sem mudança",
+        summary['inserted'], summary['updated'], summary['reactivated'], summary['retired'], summary['unchanged']
+    )
+    return summary
 
 if __name__ == "__main__":
+    setup_logging()
     migrate_questions()
+    stop_logging()
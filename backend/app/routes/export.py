@@ -0,0 +1,85 @@
+import csv
+import io
+import threading
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from ..database import db_manager
+from app.utils.auth import verify_token
+from app.utils.metrics import metrics
+from app.utils.serializer import dumps
+from .score import parse_date
+
+router = APIRouter(prefix="/compquest")
+
+CSV_COLUMNS = ["match_id", "date", "player_name", "score", "won", "question_ids"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# Exportações em andamento e linhas enviadas desde o início do processo; os geradores
+# rodam no threadpool, então as atualizações passam pelo lock
+export_stats = {"active": 0, "rows": 0}
+_stats_lock = threading.Lock()
+
+def _count(key: str, delta: int):
+    with _stats_lock:
+        export_stats[key] += delta
+
+def _ndjson_lines(batches: Iterator) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(dumps({
+            "match_id": row['match_id'],
+            "date": row['data'],
+            "player_name": row['nome'],
+            "score": row['score'],
+            "won": bool(row['venceu']),
+            "question_ids": [int(q) for q in row['perguntas'].split()] if row['perguntas'] else []
+        }) + "\n" for row in rows).encode("utf-8")
+        _count("rows", len(rows))
+
+def _csv_lines(batches: Iterator) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for rows in batches:
+        writer.writerows(
+            (row['match_id'], row['data'], row['nome'], row['score'], int(row['venceu']), row['perguntas'] or "")
+            for row in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        _count("rows", len(rows))
+
+def _tracked(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    _count("active", 1)
+    try:
+        yield from chunks
+    finally:
+        _count("active", -1)
+
+@router.get("/export/matches")
+async def export_matches(format: str = "ndjson", date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         batch_size: int = 1000, token: bool = Depends(verify_token)):
+    """Exporta o histórico de partidas (uma linha por jogador em cada partida) em NDJSON ou CSV
+    
+    A resposta é gerada em streaming, um lote de linhas do banco por vez, com
+    memória constante independente do tamanho do histórico. O gerador é
+    síncrono: o Starlette o consome no threadpool, fora do event loop e do
+    executor do banco, e a leitura usa uma conexão própria (iter_match_rows).
+    """
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid format: expected 'ndjson' or 'csv'")
+    batches = db_manager.iter_match_rows(
+        batch_size=min(max(batch_size, 1), 10_000),
+        date_from=parse_date(date_from, "date_from"),
+        date_to=parse_date(date_to, "date_to")
+    )
+    lines = _csv_lines(batches) if format == "csv" else _ndjson_lines(batches)
+    return StreamingResponse(
+        _tracked(lines),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="compquest_matches.{format}"'}
+    )
+
+metrics.gauge("compquest_exports_active", "Exportações do histórico de partidas em andamento", lambda: export_stats["active"])
+metrics.counter("compquest_export_rows_total", "Linhas do histórico de partidas exportadas", lambda: export_stats["rows"])
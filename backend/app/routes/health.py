@@ -1,7 +1,10 @@
 from fastapi import status, APIRouter, Depends
-from fastapi.responses import JSONResponse
+from app.utils.responses import FastJSONResponse
 from app.utils.session_manager import session_manager
 from app.utils.auth import verify_token
+from app.database import db_manager
+from app.utils.match_persister import match_persister
+from app.utils.answer_log import answer_log
 
 router = APIRouter(prefix="/compquest")
 
@@ -9,13 +12,17 @@ router = APIRouter(prefix="/compquest")
 async def health_check(token: bool = Depends(verify_token)):
     session_stats = {
         "total_sessions": len(session_manager.sessions),
-        "waiting_sessions": len([s for s in session_manager.sessions.values() if s["status"] == "waiting"]),
-        "open_sessions": len([s for s in session_manager.sessions.values() if s["status"] == "ready"]),
+        "waiting_sessions": session_manager.status_counts["waiting"],
+        "open_sessions": session_manager.status_counts["ready"],
     }
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=200,
         content={
             "status": "Running!",
-            "sessions": session_stats
+            "sessions": session_stats,
+            "session_lifecycle": session_manager.stats(),
+            "database": db_manager.pool_stats(),
+            "match_writer": match_persister.stats(),
+            "answer_log": answer_log.stats()
         }
     )
\ No newline at end of file
@@ -1,95 +1,91 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.utils.Player import Player
 from app.utils.pick_questions import pick_questions
+from app.utils.question_bank import question_bank
+from app.utils.seen_questions import seen_questions
 from app.utils.session_manager import session_manager
-from app.utils.websocket_manager import websocket_manager
 from app.utils.game_logic import game_logic
 from app.utils.auth import verify_token
-import random
-import asyncio
+from app.utils.logger import get_logger
+from app.database import async_db_manager
 
 router = APIRouter(prefix="/compquest")
+logger = get_logger("routes")
 
 @router.post("/launch")
 async def create_session(player: Player, token: bool = Depends(verify_token)):
-    questions = pick_questions()
-    print(f"Criando sessão com {len(questions)} questões")
-    session_id = session_manager.create_session(player.name, questions)
+    if not question_bank.loaded:
+        await async_db_manager.run(question_bank.ensure_loaded)
+    # Sem ir ao banco: usa o histórico do criador só se já estiver em memória; notify_session_ready
+    # carrega os históricos e sorteia de novo apenas se alguma questão já tiver sido vista
+    questions = pick_questions([player.name])
+    logger.debug("Criando sessão com %d questões", len(questions))
+    session_id = await session_manager.create_session(player.name, questions)
     session = session_manager.get_session(session_id)
-    print(f"Sessão criada: {session_id}, questões na sessão: {len(session.get('questions', []))}")
+    logger.debug("Sessão criada: %s, questões na sessão: %d", session_id, len(session.questions))
     return {"session_id": session_id, "message": "Session created, waiting for second player."}
 
 @router.post("/join-session/{session_id}")
 async def join_session(session_id: str, player: Player, token: bool = Depends(verify_token)):
     session = session_manager.get_session(session_id)
-    if not session:
+    if session:
+        if len(session.players) >= 2:
+            raise HTTPException(status_code=400, detail="Session is full")
+        if player.name in session.players:
+            raise HTTPException(status_code=400, detail="Player already in session")
+    elif session_manager.owns(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    if len(session["players"]) >= 2:
-        raise HTTPException(status_code=400, detail="Session is full")
-    if player.name in session["players"]:
-        raise HTTPException(status_code=400, detail="Player already in session")
 
-    success = session_manager.add_player_to_session(session_id, player.name)
-    if not success:
+    # Histórico carregado antes de entrar: se preciso, as questões são sorteadas de novo quando a sessão fica pronta
+    if not seen_questions.is_loaded(player.name):
+        await async_db_manager.run(seen_questions.ensure_loaded, player.name)
+
+    # Sessões de outro worker são ocupadas pelo diretório compartilhado
+    players = await session_manager.add_player_to_session(session_id, player.name)
+    if not players:
         raise HTTPException(status_code=400, detail="Could not join session")
 
-    if len(session["players"]) == 2:
-        await _notify_session_ready(session_id)
-        return {"session_id": session_id, "message": "Game ready!", "players": session["players"]}
+    if len(players) == 2:
+        if session:
+            await game_logic.notify_session_ready(session_id)
+        return {"session_id": session_id, "message": "Game ready!", "players": players}
     else:
-        return {"session_id": session_id, "message": "Waiting for second player...", "players": session["players"]}
+        return {"session_id": session_id, "message": "Waiting for second player...", "players": players}
 
 @router.post("/join-random-session")
 async def join_random_session(player: Player, token: bool = Depends(verify_token)):
-    available_sessions = session_manager.get_available_sessions()
-    if not available_sessions:
+    if not seen_questions.is_loaded(player.name):
+        await async_db_manager.run(seen_questions.ensure_loaded, player.name)
+
+    # Entra atomicamente na sessão em espera mais antiga (que não seja do próprio jogador)
+    claimed = await session_manager.claim_waiting_session(player.name)
+    if claimed is None:
         raise HTTPException(status_code=404, detail="No available sessions found")
     
-    session_id, session = random.choice(available_sessions)
-
-    if player.name in session["players"]:
-        raise HTTPException(status_code=400, detail="Player already in session")
-
-    success = session_manager.add_player_to_session(session_id, player.name)
-    if not success:
-        raise HTTPException(status_code=400, detail="Could not join session")
+    session_id, players = claimed
 
-    if len(session["players"]) == 2:
-        await _notify_session_ready(session_id)
-        return {"session_id": session_id, "message": "Game ready!", "players": session["players"]}
+    if len(players) == 2:
+        # Se a sessão for de outro worker, o dono avisa os jogadores ao receber o WebSocket
+        if session_id in session_manager.sessions:
+            await game_logic.notify_session_ready(session_id)
+        return {"session_id": session_id, "message": "Game ready!", "players": players}
     else:
-        return {"session_id": session_id, "message": "Waiting for second player...", "players": session["players"]}
+        return {"session_id": session_id, "message": "Waiting for second player...", "players": players}
 
 @router.get("/session/{session_id}")
 def get_session(session_id: str, token: bool = Depends(verify_token)):
     session = session_manager.get_session(session_id)
     if not session:
+        if not session_manager.owns(session_id):
+            raise HTTPException(status_code=421, detail="Session belongs to another worker")
         raise HTTPException(status_code=404, detail="Session not found")
-    return session
+    return session.to_dict()
 
 @router.get("/sessions")
 def get_all_sessions(token: bool = Depends(verify_token)):
     return {
         "total_sessions": len(session_manager.sessions),
-        "waiting_sessions": len([s for s in session_manager.sessions.values() if s["status"] == "waiting"]),
-        "active_sessions": len([s for s in session_manager.sessions.values() if s["status"] == "ready"]),
-        "sessions": {sid: {"players": s["players"], "status": s["status"]} for sid, s in session_manager.sessions.items()}
+        "waiting_sessions": session_manager.status_counts["waiting"],
+        "active_sessions": session_manager.status_counts["ready"],
+        "sessions": {sid: {"players": s.players, "status": s.status} for sid, s in session_manager.sessions.items()}
     }
-
-async def _notify_session_ready(session_id: str):
-    print(f"Notificando sessão pronta: {session_id}")
-    session = session_manager.get_session(session_id)
-    
-    session_data = session.copy()
-    session_data["players_ready"] = list(session.get("players_ready", set()))
-    session_data["has_used_turing"] = session.get("has_used_turing", {})
-    session_data["has_used_memory_stick"] = session.get("has_used_memory_stick", {})
-    
-    await websocket_manager.broadcast_to_session(session_id, {
-        "event": "session_ready",
-        "session": session_data
-    })
-    
-    await asyncio.sleep(2)
-    await game_logic.send_question(session_id)
\ No newline at end of file
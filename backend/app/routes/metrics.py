@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.utils.auth import verify_token
+from app.utils.metrics import metrics
+
+router = APIRouter(prefix="/compquest")
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(token: bool = Depends(verify_token)):
+    """Métricas no formato de exposição do Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+from ..database import async_db_manager
+from app.utils.auth import verify_token
+
+router = APIRouter(prefix="/compquest")
+
+class QuestionStatsResponse(BaseModel):
+    question_id: int
+    answers: int
+    correct: int
+    accuracy: Optional[float]
+    avg_response_time: Optional[float]
+    median_response_time: Optional[float]
+    turing_used: int
+    memory_stick_used: int
+
+@router.get("/question-stats")
+async def get_hardest_questions(limit: int = 20, min_answers: int = 1, token: bool = Depends(verify_token)):
+    """Questões de menor acurácia (agregados mantidos a cada lote do log de respostas)"""
+    try:
+        stats = await async_db_manager.get_question_stats(limit=min(max(limit, 1), 500), min_answers=min_answers)
+        return {"questions": stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting question stats: {str(e)}")
+
+@router.get("/question-stats/{question_id}")
+async def get_question_stats(question_id: int, token: bool = Depends(verify_token)):
+    try:
+        stats = await async_db_manager.get_question_stats([question_id])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting question stats: {str(e)}")
+    if not stats:
+        raise HTTPException(status_code=404, detail="No answers recorded for this question")
+    return QuestionStatsResponse(**stats[0])
@@ -3,7 +3,9 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
-from ..database import db_manager
+from datetime import datetime, timezone
+import base64
+from ..database import async_db_manager
 from app.utils.auth import verify_token
 
 router = APIRouter(prefix="/compquest")
@@ -28,25 +30,51 @@ class PlayerStatsResponse(BaseModel):
     wins: int
     best_score: int
 
+def _encode_cursor(key: tuple) -> str:
+    """Cursor opaco da próxima página a partir do next_key (data, id da partida, id do jogador)"""
+    raw = "|".join(str(part) for part in key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, match_id, player_id = raw.rsplit("|", 2)
+        return date, int(match_id), int(player_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_date(value: Optional[str], field: str) -> Optional[str]:
+    """Normaliza uma data ISO 8601 para o formato de partida.data ("AAAA-MM-DD HH:MM:SS", em UTC)
+
+    Datas com fuso (offset ou "Z") são convertidas para UTC; datas sem fuso já são tratadas como UTC.
+    """
+    if value is None:
+        return None
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}: expected ISO 8601 date")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
 @router.post("/score")
 async def save_score(score_request: ScoreRequest, token: bool = Depends(verify_token)):
     try:
-        player_id = db_manager.get_or_create_player(score_request.player_name)
+        player_id = await async_db_manager.get_or_create_player(score_request.player_name)
         
-        match_id = db_manager.create_match()
+        match_id = await async_db_manager.create_match()
         
-        db_manager.save_match_result(
+        await async_db_manager.save_match_result(
             match_id=match_id,
             player_id=player_id,
             score=score_request.score,
             won=score_request.won
         )
         
-        with db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT data FROM partida WHERE id = ?", (match_id,))
-            result = cursor.fetchone()
-            match_date = result['data'] if result else None
+        match_date = await async_db_manager.get_match_date(match_id)
         
         return ScoreResponse(
             player_name=score_request.player_name,
@@ -61,43 +89,40 @@ async def save_score(score_request: ScoreRequest, token: bool = Depends(verify_t
 @router.get("/score/{player_name}")
 async def get_player_stats(player_name: str, token: bool = Depends(verify_token)):
     try:
-        stats = db_manager.get_player_stats(player_name)
+        stats = await async_db_manager.get_player_stats(player_name)
         return PlayerStatsResponse(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting player stats: {str(e)}")
 
 @router.get("/score")
-async def get_all_scores(token: bool = Depends(verify_token)):
+async def get_all_scores(cursor: Optional[str] = None, limit: int = 50, player_name: Optional[str] = None,
+                         date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         token: bool = Depends(verify_token)):
+    """Histórico de resultados, mais recentes primeiro, paginado por cursor
+    
+    Para a próxima página, repita a chamada com os mesmos filtros e
+    cursor=next_cursor; next_cursor é null na última página.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    date_from = parse_date(date_from, "date_from")
+    date_to = parse_date(date_to, "date_to")
     try:
-        with db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT j.nome, j.score, j.venceu, p.data, p.id as match_id
-                FROM joga j
-                JOIN jogador jg ON j.id_jogador = jg.id
-                JOIN partida p ON j.id_partida = p.id
-                ORDER BY p.data DESC
-                LIMIT 50
-            """)
-            
-            scores = []
-            for row in cursor.fetchall():
-                scores.append({
-                    "player_name": row['nome'],
-                    "score": row['score'],
-                    "won": bool(row['venceu']),
-                    "date": row['data'],
-                    "match_id": row['match_id']
-                })
-            
-            return {"scores": scores}
+        page = await async_db_manager.get_score_page(
+            limit=min(max(limit, 1), 500),
+            after=after,
+            player_name=player_name,
+            date_from=date_from,
+            date_to=date_to
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting scores: {str(e)}")
+    next_cursor = _encode_cursor(page['next_key']) if page['next_key'] else None
+    return {"scores": page['scores'], "next_cursor": next_cursor}
 
 @router.get("/top-players")
 async def get_top_players(limit: int = 3, token: bool = Depends(verify_token)):
     try:
-        top_players = db_manager.get_top_players(limit)
+        top_players = await async_db_manager.get_top_players(limit)
         return {"top_players": top_players}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting top players: {str(e)}")
\ No newline at end of file
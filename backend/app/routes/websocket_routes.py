@@ -3,9 +3,22 @@ from app.utils.session_manager import session_manager
 from app.utils.game_logic import game_logic
 from app.utils.auth import verify_websocket_token
 from app.utils.websocket_manager import websocket_manager
-import asyncio
+from app.utils.metrics import metrics
+from app.utils import serializer
+from app.utils.logger import get_logger
+import time
 
 router = APIRouter(prefix="/compquest")
+logger = get_logger("ws")
+
+# Código de fechamento (faixa de aplicação 4000-4999) para conexões que chegaram ao worker errado
+MISDIRECTED_CLOSE_CODE = 4421
+
+event_latency = metrics.histogram(
+    "compquest_ws_event_seconds",
+    "Tempo de processamento de cada evento recebido pelo WebSocket (resposta, poderes, pronto)",
+    label="event"
+)
 
 @router.websocket("/ws/{session_id}/{player_name}")
 async def websocket_game(websocket: WebSocket, session_id: str, player_name: str):
@@ -13,38 +26,43 @@ async def websocket_game(websocket: WebSocket, session_id: str, player_name: str
     
     # Verifica token de autenticação
     if not await verify_websocket_token(websocket):
-        await websocket.send_json({"error": "Token inválido ou ausente"})
+        await websocket.send_text(serializer.dumps({"error": "Token inválido ou ausente"}))
         await websocket.close(code=1008)
         return
-    print(f"WebSocket conectado: {player_name} na sessão {session_id}")
+    logger.debug("WebSocket conectado: %s na sessão %s", player_name, session_id)
     
-    session_manager.add_connection(session_id, player_name, websocket)
-
     session = session_manager.get_session(session_id)
     if not session:
-        await websocket.send_json({"event": "error", "message": "Sessão não encontrada"})
+        if not session_manager.owns(session_id):
+            # Afinidade por sessão: o proxy deve rotear pelo prefixo do ID até o worker dono
+            await websocket.send_text(serializer.dumps({"event": "error", "message": "Sessão pertence a outro worker"}))
+            await websocket.close(code=MISDIRECTED_CLOSE_CODE)
+            return
+        await websocket.send_text(serializer.dumps({"event": "error", "message": "Sessão não encontrada"}))
         return
 
-    print(f"Status da sessão: {session['status']}, jogadores: {session['players']}")
+    session_manager.add_connection(session_id, player_name, websocket)
 
-    if session["status"] == "ready":
-        session_data = session.copy()
-        session_data["players_ready"] = list(session.get("players_ready", set()))
-        session_data["has_used_turing"] = session.get("has_used_turing", {})
-        session_data["has_used_memory_stick"] = session.get("has_used_memory_stick", {})
-        
-        await websocket.send_json({
+    logger.debug("Status da sessão: %s, jogadores: %s", session.status, session.players)
+
+    if await session_manager.sync_session(session_id):
+        # O segundo jogador entrou por outro worker; só agora o dono sabe que a sessão está completa
+        await game_logic.notify_session_ready(session_id)
+    elif session.status == "ready":
+        await websocket.send_text(serializer.dumps({
             "event": "session_ready",
-            "session": session_data
-        })
+            "session": session.to_dict()
+        }))
         
-        if session["current_index"] == 0 and not session.get("round_answered", False):
-            await asyncio.sleep(1)
-            await game_logic.send_question(session_id)
+        # A primeira questão já foi agendada por notify_session_ready; quem conecta depois
+        # do envio recebe só ela, sem reiniciar a rodada do oponente
+        if session.current_index == 0 and not session.round_answered and session.round_start_time is not None:
+            await websocket.send_text(game_logic.new_question_text(0, len(session.questions), session.questions[0]))
 
     try:
         while True:
-            data = await websocket.receive_json()
+            data = serializer.loads(await websocket.receive_text())
+            start = time.perf_counter()
             if data["event"] == "answer":
                 await game_logic.handle_answer(session_id, player_name, data["answer"])
             elif data["event"] == "ready_next":
@@ -53,9 +71,12 @@ async def websocket_game(websocket: WebSocket, session_id: str, player_name: str
                 await game_logic.handle_use_turing(session_id, player_name)
             elif data["event"] == "use_memory_stick":
                 await game_logic.handle_use_memory_stick(session_id, player_name)
+            else:
+                continue
+            event_latency.labels(data["event"]).observe(time.perf_counter() - start)
     except WebSocketDisconnect:
-        print(f"WebSocket desconectado: {player_name}")
-        session_manager.remove_connection(session_id, player_name)
+        logger.debug("WebSocket desconectado: %s", player_name)
+        session_manager.remove_connection(session_id, player_name, websocket)
         
         # Notifica os jogadores restantes que este jogador desconectou
         session = session_manager.get_session(session_id)
@@ -0,0 +1,246 @@
+"""Schema do banco de dados e suas migrações versionadas
+
+Cada migração é uma função que recebe o cursor e roda dentro da transação de
+apply_migrations. A versão aplicada fica em schema_version, então um banco já
+atualizado custa uma única consulta na inicialização. As migrações também são
+idempotentes (IF NOT EXISTS, checagem de colunas), porque bancos criados antes
+do schema_version passam por todas elas uma vez.
+
+Para alterar o schema, acrescente uma função ao fim de MIGRATIONS; nunca edite
+uma migração já publicada.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+def rebuild_leaderboard(cursor) -> int:
+    """Recalcula o ranking (melhor score de cada jogador) a partir de joga"""
+    cursor.execute("DELETE FROM ranking")
+    cursor.execute("""
+        INSERT INTO ranking (id_jogador, melhor_score)
+        SELECT id_jogador, MAX(score) FROM joga GROUP BY id_jogador
+    """)
+    return cursor.rowcount
+
+def rebuild_player_stats(cursor) -> int:
+    """Recalcula os totais de cada jogador a partir de joga"""
+    cursor.execute("DELETE FROM estatistica_jogador")
+    cursor.execute("""
+        INSERT INTO estatistica_jogador (id_jogador, partidas, score_total, vitorias)
+        SELECT id_jogador, COUNT(*), SUM(score), SUM(venceu) FROM joga GROUP BY id_jogador
+    """)
+    return cursor.rowcount
+
+def _create_base_tables(cursor):
+    # Cria tabela categoria
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categoria (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dificuldade VARCHAR(10) NOT NULL UNIQUE,
+            CHECK (dificuldade IN ('facil', 'medio', 'dificil'))
+        )
+    """)
+
+    # Cria tabela pergunta
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pergunta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            dica TEXT,
+            explicacao TEXT,
+            id_categoria INTEGER NOT NULL,
+            FOREIGN KEY (id_categoria) REFERENCES categoria(id)
+        )
+    """)
+
+    # Cria tabela alternativa
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alternativa (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            letra VARCHAR(1) NOT NULL,
+            correta INTEGER NOT NULL DEFAULT 0,
+            id_pergunta INTEGER NOT NULL,
+            FOREIGN KEY (id_pergunta) REFERENCES pergunta(id),
+            CHECK (letra IN ('A', 'B', 'C', 'D')),
+            CHECK (correta IN (0, 1))
+        )
+    """)
+
+    # Cria tabela jogador
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jogador (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome VARCHAR(50) NOT NULL UNIQUE
+        )
+    """)
+
+    # Cria tabela partida
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS partida (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Cria tabela joga (entidade associativa)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS joga (
+            id_jogador INTEGER NOT NULL,
+            id_partida INTEGER NOT NULL,
+            score INTEGER NOT NULL DEFAULT 0,
+            venceu INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_jogador, id_partida),
+            FOREIGN KEY (id_jogador) REFERENCES jogador(id),
+            FOREIGN KEY (id_partida) REFERENCES partida(id),
+            CHECK (venceu IN (0, 1)),
+            CHECK (score >= 0)
+        )
+    """)
+
+    # Cria tabela contem (entidade associativa)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contem (
+            id_partida INTEGER NOT NULL,
+            id_pergunta INTEGER NOT NULL,
+            PRIMARY KEY (id_partida, id_pergunta),
+            FOREIGN KEY (id_partida) REFERENCES partida(id),
+            FOREIGN KEY (id_pergunta) REFERENCES pergunta(id)
+        )
+    """)
+
+    # Cria índices
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pergunta_categoria ON pergunta(id_categoria)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alternativa_pergunta ON alternativa(id_pergunta)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_joga_jogador ON joga(id_jogador)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_joga_partida ON joga(id_partida)")
+
+def _create_ranking(cursor):
+    # Melhor score de cada jogador, mantido a cada resultado salvo
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ranking (
+            id_jogador INTEGER PRIMARY KEY,
+            melhor_score INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (id_jogador) REFERENCES jogador(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ranking_score ON ranking(melhor_score DESC)")
+    rebuild_leaderboard(cursor)
+
+def _create_player_stats(cursor):
+    # Totais de cada jogador, mantidos a cada resultado salvo
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estatistica_jogador (
+            id_jogador INTEGER PRIMARY KEY,
+            partidas INTEGER NOT NULL DEFAULT 0,
+            score_total INTEGER NOT NULL DEFAULT 0,
+            vitorias INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (id_jogador) REFERENCES jogador(id)
+        )
+    """)
+    rebuild_player_stats(cursor)
+
+def _add_question_hash(cursor):
+    # Hash do conteúdo e flag de ativa, usados pela migração incremental de questões
+    cursor.execute("PRAGMA table_info(pergunta)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "hash" not in columns:
+        cursor.execute("ALTER TABLE pergunta ADD COLUMN hash TEXT")
+    if "ativa" not in columns:
+        cursor.execute("ALTER TABLE pergunta ADD COLUMN ativa INTEGER NOT NULL DEFAULT 1 CHECK (ativa IN (0, 1))")
+
+def _create_answer_log(cursor):
+    # Log append-only de cada resposta/poder usado, gravado em lote pelo AnswerLog
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resposta (
+            id INTEGER PRIMARY KEY,
+            id_pergunta INTEGER NOT NULL,
+            id_jogador INTEGER NOT NULL,
+            tipo VARCHAR(10) NOT NULL,
+            correta INTEGER,
+            tempo_ms INTEGER NOT NULL,
+            indice INTEGER NOT NULL,
+            sessao TEXT NOT NULL,
+            data TIMESTAMP NOT NULL,
+            FOREIGN KEY (id_pergunta) REFERENCES pergunta(id),
+            FOREIGN KEY (id_jogador) REFERENCES jogador(id),
+            CHECK (tipo IN ('resposta', 'turing', 'pente')),
+            CHECK (correta IN (0, 1))
+        )
+    """)
+    # Agregados por questão, somados a cada lote gravado
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estatistica_pergunta (
+            id_pergunta INTEGER PRIMARY KEY,
+            respostas INTEGER NOT NULL DEFAULT 0,
+            acertos INTEGER NOT NULL DEFAULT 0,
+            turing INTEGER NOT NULL DEFAULT 0,
+            pente INTEGER NOT NULL DEFAULT 0,
+            tempo_total_ms INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (id_pergunta) REFERENCES pergunta(id)
+        )
+    """)
+    # Histograma do tempo de resposta por questão (limite superior de cada faixa, em ms)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estatistica_pergunta_tempo (
+            id_pergunta INTEGER NOT NULL,
+            limite_ms INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_pergunta, limite_ms),
+            FOREIGN KEY (id_pergunta) REFERENCES pergunta(id)
+        )
+    """)
+
+def _index_match_history(cursor):
+    # Histórico de partidas paginado por (data, id) em GET /score
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_partida_data ON partida(data, id)")
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "tabelas base", _create_base_tables),
+    (2, "ranking materializado", _create_ranking),
+    (3, "totais por jogador", _create_player_stats),
+    (4, "hash e flag de ativa das questões", _add_question_hash),
+    (5, "log de respostas e estatísticas por questão", _create_answer_log),
+    (6, "índice do histórico de partidas por data", _index_match_history),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Versão do schema do banco (0 se schema_version ainda não existe)"""
+    try:
+        return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+def apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Aplica as migrações pendentes numa única transação; retorna as versões aplicadas
+
+    A versão é relida depois do BEGIN IMMEDIATE: se vários workers sobem juntos,
+    só o primeiro a obter o lock migra e os demais encontram o banco atualizado.
+    """
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                aplicada TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        version = current_version(conn)
+        applied = []
+        for number, description, migration in MIGRATIONS:
+            if number > version:
+                migration(cursor)
+                cursor.execute("INSERT INTO schema_version (versao, descricao) VALUES (?, ?)", (number, description))
+                applied.append(number)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
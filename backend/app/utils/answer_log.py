@@ -0,0 +1,54 @@
+import os
+import time
+from typing import List, Optional
+from ..database import async_db_manager, ANSWER, TURING_USED, MEMORY_STICK_USED
+from .batch_writer import BatchWriter
+from .metrics import metrics
+
+class AnswerLog(BatchWriter):
+    """Log de respostas com gravação em lote
+
+    Cada resposta (ou poder usado) vira uma tupla num buffer em memória, sem
+    nenhum acesso ao banco no caminho da jogada. O buffer é gravado em lote na
+    tabela resposta, junto com a soma dos agregados por questão, quando atinge
+    `batch_size` registros ou a cada `flush_interval` segundos. Acima de
+    `max_pending` registros (banco indisponível) os mais antigos são descartados,
+    e um lote que falha `max_attempts` vezes também.
+    """
+
+    item_name = "respostas"
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 100_000,
+                 max_attempts: int = 3):
+        super().__init__(batch_size, flush_interval, max_attempts, max_pending)
+
+    def record(self, session_id: str, question: dict, player_name: str, kind: str,
+               correct: Optional[bool], elapsed: float, index: int):
+        """Acrescenta um registro ao buffer; elapsed é o tempo desde o início da rodada, em segundos"""
+        question_id = question.get("id")
+        if question_id is None:
+            return
+        self._add((session_id, question_id, player_name, kind, correct, int(elapsed * 1000), index, time.time()))
+
+    def answer(self, session_id: str, question: dict, player_name: str, correct: bool, elapsed: float, index: int):
+        self.record(session_id, question, player_name, ANSWER, correct, elapsed, index)
+
+    def turing(self, session_id: str, question: dict, player_name: str, elapsed: float, index: int):
+        self.record(session_id, question, player_name, TURING_USED, True, elapsed, index)
+
+    def memory_stick(self, session_id: str, question: dict, player_name: str, elapsed: float, index: int):
+        self.record(session_id, question, player_name, MEMORY_STICK_USED, None, elapsed, index)
+
+    async def write(self, batch: List[tuple]):
+        await async_db_manager.save_answers(batch)
+
+answer_log = AnswerLog(
+    batch_size=int(os.getenv("COMPQUEST_ANSWER_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("COMPQUEST_ANSWER_FLUSH_INTERVAL", "1.0")),
+    max_pending=int(os.getenv("COMPQUEST_ANSWER_MAX_PENDING", "100000"))
+)
+
+metrics.gauge("compquest_answer_log_pending", "Registros do log de respostas aguardando gravação", lambda: answer_log.pending)
+metrics.counter("compquest_answer_log_saved_total", "Registros do log de respostas gravados no banco", lambda: answer_log.saved)
+metrics.counter("compquest_answer_log_failures_total", "Lotes do log de respostas que falharam ao gravar", lambda: answer_log.failures)
+metrics.counter("compquest_answer_log_dropped_total", "Registros do log de respostas descartados (excesso no buffer ou tentativas esgotadas)", lambda: answer_log.dropped)
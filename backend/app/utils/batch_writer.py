@@ -0,0 +1,127 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+from .logger import get_logger
+
+logger = get_logger("db")
+
+class BatchWriter(ABC):
+    """Gravação em lote (write-behind) de itens acumulados em memória
+
+    Os itens entram num buffer sem nenhum acesso ao banco e são gravados por
+    `write` em lotes de até `batch_size`, quando o buffer atinge esse tamanho ou
+    a cada `flush_interval` segundos. Um lote que falha é repetido antes dos
+    demais no próximo ciclo, até `max_attempts` tentativas, e depois descartado.
+    Com `max_pending`, os itens mais antigos além desse limite são descartados
+    (banco indisponível). Ao parar, o buffer é esvaziado: os lotes que falham
+    são repetidos na hora e o que não puder ser gravado é registrado no log.
+
+    Subclasses implementam `write` e definem `item_name` (usado nos logs).
+    """
+
+    item_name = "itens"
+
+    def __init__(self, batch_size: int, flush_interval: float = 1.0, max_attempts: int = 3,
+                 max_pending: Optional[int] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self._pending: List[Any] = []
+        # Lote que falhou e suas tentativas, gravado antes do restante do buffer
+        self._retry: List[Any] = []
+        self._retry_attempts = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Métricas
+        self.saved = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @abstractmethod
+    async def write(self, batch: List[Any]):
+        """Grava um lote no banco; uma exceção conta como tentativa falha do lote"""
+
+    def _add(self, item: Any):
+        self._pending.append(item)
+        if self.max_pending is not None and len(self._pending) > self.max_pending:
+            excess = len(self._pending) - self.max_pending
+            del self._pending[:excess]
+            self.dropped += excess
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._retry)
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Para o laço de gravação e grava tudo o que ainda estiver no buffer"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self._drain()
+
+    async def _drain(self):
+        """Esvazia o buffer sem esperar ciclos: cada flush grava um lote ou gasta uma tentativa dele"""
+        dropped_before = self.dropped
+        while self.pending:
+            await self.flush()
+            if self._retry:
+                # Falha transitória (ex.: banco ocupado): espera um pouco antes de repetir
+                await asyncio.sleep(0.1 * self._retry_attempts)
+        lost = self.dropped - dropped_before
+        if lost:
+            logger.error("Parada com %d %s descartados sem gravar", lost, self.item_name)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Grava o buffer em lotes de até batch_size itens; para no primeiro lote que falhar"""
+        while self._retry or self._pending:
+            if self._retry:
+                batch, attempts, self._retry = self._retry, self._retry_attempts, []
+            else:
+                batch, attempts = self._pending[:self.batch_size], 0
+                del self._pending[:self.batch_size]
+            try:
+                await self.write(batch)
+                self.saved += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error("Erro ao salvar lote de %d %s: %s", len(batch), self.item_name, e)
+                if attempts + 1 < self.max_attempts:
+                    # Tenta de novo no próximo ciclo, antes do restante do buffer
+                    self._retry, self._retry_attempts = batch, attempts + 1
+                else:
+                    self.dropped += len(batch)
+                    logger.error("Lote de %d %s descartado após %d tentativas", len(batch), self.item_name, attempts + 1)
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "saved": self.saved,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }
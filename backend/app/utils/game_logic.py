@@ -1,66 +1,92 @@
 from .session_manager import session_manager
 from .websocket_manager import websocket_manager
-from ..database import db_manager
+from .question_bank import question_bank
+from .seen_questions import seen_questions
+from .pick_questions import pick_questions
+from .match_persister import match_persister
+from .answer_log import answer_log
+from .scheduler import session_scheduler
+from .session_state import TURING, MEMORY_STICK, FINISHED
+from .logger import get_logger
+from ..database import async_db_manager
 import time
-import asyncio
-import random
+
+logger = get_logger("game")
 
 class GameLogic:
+    async def notify_session_ready(self, session_id: str):
+        """Avisa os jogadores que a sessão está completa e agenda a primeira questão"""
+        logger.debug("Notificando sessão pronta: %s", session_id)
+        session = session_manager.get_session(session_id)
+        
+        # Com os dois jogadores conhecidos, sorteia de novo só se alguma questão já foi vista por um deles
+        for player_name in session.players:
+            if not seen_questions.is_loaded(player_name):
+                await async_db_manager.run(seen_questions.ensure_loaded, player_name)
+        if seen_questions.any_seen(session.players, [question["id"] for question in session.questions]):
+            session.questions = pick_questions(session.players) or session.questions
+        
+        await websocket_manager.broadcast_to_session(session_id, {
+            "event": "session_ready",
+            "session": session.to_dict()
+        })
+        
+        session_scheduler.call_later(2, session_id, self.send_question, session_id)
+    
     async def send_question(self, session_id: str):
         session = session_manager.get_session(session_id)
         if not session:
             return
             
-        idx = session["current_index"]
+        idx = session.current_index
         
-        if idx >= len(session["questions"]):
+        if idx >= len(session.questions):
             return
             
-        question = session["questions"][idx].copy()
-        question_to_send = {
-            "question": question["question"],
-            "options": question["options"],
-            "oracle_hint": question.get("oracle_hint", "")
-        }
+        question = session.questions[idx]
 
-        session["round_answered"] = False
-        session["round_winner"] = None
-        session["round_answer"] = None
-        session["round_start_time"] = time.time()
-        session["players_ready"] = set()
+        session.reset_round(time.time())
 
-        print(f"Enviando questão {idx + 1} para sessão {session_id}")
-        print(f"Questão: {question['question']}")
-        print(f"Opções: {question['options']}")
-        print(f"Resposta correta: '{question['answer']}'")
+        logger.debug("Enviando questão %d para sessão %s: %s | opções: %s | resposta correta: '%s'",
+                     idx + 1, session_id, question["question"], question["options"], question["answer"])
 
-        message = {
-            "event": "new_question",
-            "index": idx + 1,
-            "total": len(session["questions"]),
-            "question": question_to_send
-        }
-        
-        await websocket_manager.broadcast_to_session(session_id, message)
+        await websocket_manager.broadcast_text(
+            session_id, self.new_question_text(idx, len(session.questions), question)
+        )
+    
+    @staticmethod
+    def new_question_text(idx: int, total: int, question: dict, memory_stick_used: bool = False) -> str:
+        """Monta o evento new_question em volta do frame pré-codificado da questão
+        
+        Só os campos do envelope (índice e total) são formatados a cada envio; o
+        texto equivale a websocket_manager.encode() do dicionário do evento.
+        """
+        extra = ',"memory_stick_used":true' if memory_stick_used else ""
+        return (f'{{"event":"new_question","index":{idx + 1},"total":{total},'
+                f'"question":{question_bank.frame(question)}{extra}}}')
     
     async def handle_answer(self, session_id: str, player_name: str, answer: str):
         session = session_manager.get_session(session_id)
         if not session:
             return
         
-        if session.get("round_answered", False):
-            print(f"Resposta tardia ignorada de {player_name}")
+        slot = session.slot(player_name)
+        if slot < 0:
+            return
+        
+        if session.round_answered:
+            logger.debug("Resposta tardia ignorada de %s", player_name)
             return
         
-        print(f"{player_name} respondeu: {answer}")
+        logger.debug("%s respondeu: %s", player_name, answer)
         
-        session["round_answered"] = True
-        session["round_winner"] = player_name
-        session["round_answer"] = answer
-        session["round_time"] = time.time() - session["round_start_time"]
+        session.round_answered = True
+        session.round_winner = player_name
+        session.round_answer = answer
+        session.round_time = time.time() - session.round_start_time
         
-        idx = session["current_index"]
-        current_question = session["questions"][idx]
+        idx = session.current_index
+        current_question = session.questions[idx]
         correct_answer = current_question["answer"]
         
         answer_options = current_question["options"]
@@ -73,21 +99,23 @@ class GameLogic:
             selected_answer_text = answer
             is_correct = False
         
+        answer_log.answer(session_id, current_question, player_name, is_correct, session.round_time, idx)
+        
         # Calcula pontos base para esta questão
         base_points = self._calculate_points(idx)
         
         if is_correct:
             # RESPOSTA CORRETA: Aplica sistema de multiplicador de sequência
             # Obtém sequência atual e calcula multiplicador
-            current_streak = session["streaks"].get(player_name, 0)
+            current_streak = session.streaks[slot]
             multiplier = self._calculate_multiplier(current_streak)
             
             # Aplica multiplicador aos pontos base e adiciona à pontuação do jogador
             points = int(base_points * multiplier)
-            session["scores"][player_name] += points
+            session.scores[slot] += points
             
             # Aumenta sequência em +1
-            session["streaks"][player_name] = current_streak + 1
+            session.streaks[slot] = current_streak + 1
         else:
             # RESPOSTA INCORRETA: Aplica sistema de penalidade por erro
             # Penalidade: 20% dos pontos base são concedidos ao oponente
@@ -95,31 +123,29 @@ class GameLogic:
             # A sequência do jogador é resetada para 0
             penalty = int(base_points * 0.2)
             
-            # Encontra o oponente e concede os pontos de penalidade
-            opponent_name = [p for p in session["players"] if p != player_name][0]
-            session["scores"][opponent_name] += penalty
+            # Concede os pontos de penalidade ao oponente (o outro slot)
+            session.scores[1 - slot] += penalty
             
             # Reseta sequência para 0 por resposta errada
-            session["streaks"][player_name] = 0
+            session.streaks[slot] = 0
         
         await websocket_manager.broadcast_to_session(session_id, {
             "event": "player_answered",
             "player": player_name,
-            "response_time": round(session["round_time"], 2)
+            "response_time": round(session.round_time, 2)
         })
         
-        await asyncio.sleep(1.5)
-        
-        await websocket_manager.broadcast_to_session(session_id, {
+        # Agenda o resultado da rodada sem prender o laço de recebimento
+        session_scheduler.call_later(1.5, session_id, websocket_manager.broadcast_to_session, session_id, {
             "event": "round_result",
             "winner": player_name,
             "answer": selected_answer_text,
             "answer_letter": answer,
             "correct_answer": correct_answer,
             "correct": is_correct,
-            "response_time": round(session["round_time"], 2),
-            "scores": session["scores"],
-            "streaks": session["streaks"],
+            "response_time": round(session.round_time, 2),
+            "scores": session.scores_dict(),
+            "streaks": session.streaks_dict(),
             "explanation": current_question.get("explanation", "")
         })
     
@@ -155,24 +181,28 @@ class GameLogic:
         if not session:
             return
         
+        slot = session.slot(player_name)
+        if slot < 0:
+            return
+        
         # Verifica se o jogador já usou o poder
-        if session["has_used_turing"].get(player_name, False):
-            print(f"{player_name} tentou usar Alan Turing mas já o usou")
+        if session.has_used(slot, TURING):
+            logger.debug("%s tentou usar Alan Turing mas já o usou", player_name)
             return
         
         # Verifica se a rodada já foi respondida
-        if session.get("round_answered", False):
-            print(f"Uso tardio de Alan Turing ignorado de {player_name}")
+        if session.round_answered:
+            logger.debug("Uso tardio de Alan Turing ignorado de %s", player_name)
             return
         
-        print(f"{player_name} usou o poder Alan Turing")
+        logger.debug("%s usou o poder Alan Turing", player_name)
         
         # Marca como usado
-        session["has_used_turing"][player_name] = True
+        session.mark_used(slot, TURING)
         
         # Obtém a questão atual
-        idx = session["current_index"]
-        current_question = session["questions"][idx]
+        idx = session.current_index
+        current_question = session.questions[idx]
         correct_answer = current_question["answer"]
         
         # Encontra a letra da resposta correta
@@ -184,74 +214,80 @@ class GameLogic:
                 break
         
         if answer_letter is None:
-            print(f"Erro: Não foi possível encontrar a letra da resposta correta para a questão {idx}")
+            logger.error("Não foi possível encontrar a letra da resposta correta para a questão %d da sessão %s", idx, session_id)
             return
         
         # Marca a rodada como respondida
-        session["round_answered"] = True
-        session["round_winner"] = player_name
-        session["round_answer"] = answer_letter
-        session["round_time"] = time.time() - session["round_start_time"]
+        session.round_answered = True
+        session.round_winner = player_name
+        session.round_answer = answer_letter
+        session.round_time = time.time() - session.round_start_time
+        answer_log.turing(session_id, current_question, player_name, session.round_time, idx)
         
         # Calcula pontos base (Alan Turing usa multiplicador x1.0, ignorando sequência)
         base_points = self._calculate_points(idx)
         points = int(base_points * 1.0)  # Sempre multiplicador x1.0
         
         # Concede pontos
-        session["scores"][player_name] += points
+        session.scores[slot] += points
         
         # Reseta sequência para 0 (Alan Turing reseta a sequência)
-        session["streaks"][player_name] = 0
+        session.streaks[slot] = 0
         
         # Transmite que o jogador usou Alan Turing
         await websocket_manager.broadcast_to_session(session_id, {
             "event": "player_answered",
             "player": player_name,
-            "response_time": round(session["round_time"], 2),
+            "response_time": round(session.round_time, 2),
             "used_turing": True
         })
         
-        await asyncio.sleep(1.5)
-        
-        # Transmite resultado da rodada
-        await websocket_manager.broadcast_to_session(session_id, {
+        # Agenda a transmissão do resultado da rodada
+        session_scheduler.call_later(1.5, session_id, websocket_manager.broadcast_to_session, session_id, {
             "event": "round_result",
             "winner": player_name,
             "answer": correct_answer,
             "answer_letter": answer_letter,
             "correct_answer": correct_answer,
             "correct": True,
-            "response_time": round(session["round_time"], 2),
-            "scores": session["scores"],
-            "streaks": session["streaks"],
+            "response_time": round(session.round_time, 2),
+            "scores": session.scores_dict(),
+            "streaks": session.streaks_dict(),
             "explanation": current_question.get("explanation", ""),
             "used_turing": True
         })
     
     async def handle_use_memory_stick(self, session_id: str, player_name: str):
         """Lida com a ativação do poder especial Pente de Memória (Memory Stick)"""
+        # Carrega o banco de questões no executor antes de ler o estado da rodada
+        if not question_bank.loaded:
+            await async_db_manager.run(question_bank.ensure_loaded)
+        
         session = session_manager.get_session(session_id)
         if not session:
             return
         
+        slot = session.slot(player_name)
+        if slot < 0:
+            return
+        
         # Verifica se o jogador já usou o poder
-        if session["has_used_memory_stick"].get(player_name, False):
-            print(f"{player_name} tentou usar Pente de Memória mas já o usou")
+        if session.has_used(slot, MEMORY_STICK):
+            logger.debug("%s tentou usar Pente de Memória mas já o usou", player_name)
             return
         
         # Verifica se a rodada já foi respondida
-        if session.get("round_answered", False):
-            print(f"Uso tardio de Pente de Memória ignorado de {player_name}")
+        if session.round_answered:
+            logger.debug("Uso tardio de Pente de Memória ignorado de %s", player_name)
             return
         
-        print(f"{player_name} usou Pente de Memória (Memory Stick)")
+        logger.debug("%s usou Pente de Memória (Memory Stick)", player_name)
         
         # Marca como usado
-        session["has_used_memory_stick"][player_name] = True
+        session.mark_used(slot, MEMORY_STICK)
         
         # Obtém a questão atual para determinar a dificuldade
-        idx = session["current_index"]
-        current_question = session["questions"][idx]
+        idx = session.current_index
         
         # Determina dificuldade baseada no índice da questão
         if idx < 4:
@@ -261,17 +297,16 @@ class GameLogic:
         else:
             difficulty = "dificil"
         
-        # Obtém todas as questões da mesma dificuldade do banco de dados
-        all_questions = db_manager.get_questions_by_difficulty(difficulty)
-        
         # Obtém IDs das questões já usadas nesta sessão
-        used_question_ids = {q.get("id") for q in session["questions"] if q.get("id")}
+        used_question_ids = {q.get("id") for q in session.questions if q.get("id")}
         
-        # Filtra questões que já foram usadas
-        available_questions = [q for q in all_questions if q.get("id") not in used_question_ids]
+        # Sorteia uma questão da mesma dificuldade no banco em memória, ignorando as já usadas
+        # e, enquanto houver, as que algum dos jogadores já viu
+        seen = [seen_questions.get(name) for name in session.players]
+        replacement = question_bank.sample_unseen(difficulty, 1, seen, exclude_ids=used_question_ids)
         
-        if not available_questions:
-            print(f"Nenhuma questão disponível de dificuldade {difficulty} para substituir")
+        if not replacement:
+            logger.warning("Nenhuma questão disponível de dificuldade %s para substituir", difficulty)
             # Se não houver substituição disponível, não substitui
             await websocket_manager.broadcast_to_session(session_id, {
                 "event": "memory_stick_failed",
@@ -279,43 +314,15 @@ class GameLogic:
             })
             return
         
-        # Escolhe uma questão aleatória das disponíveis
-        replacement_question = random.choice(available_questions)
-        
-        # Converte para o mesmo formato das questões da sessão
-        correct_answer = None
-        options = []
-        
-        for option in replacement_question['options']:
-            options.append(option['text'])
-            if option['correct']:
-                correct_answer = option['text']
-        
-        question_data = {
-            "question": replacement_question['question'],
-            "options": options,
-            "answer": correct_answer,
-            "oracle_hint": replacement_question['hint'],
-            "explanation": replacement_question['explanation'],
-            "id": replacement_question['id']
-        }
+        question_data = replacement[0]
+        answer_log.memory_stick(session_id, session.questions[idx], player_name,
+                                time.time() - session.round_start_time, idx)
         
         # Substitui a questão atual
-        session["questions"][idx] = question_data
+        session.questions[idx] = question_data
         
         # Reseta o estado da rodada
-        session["round_answered"] = False
-        session["round_winner"] = None
-        session["round_answer"] = None
-        session["round_start_time"] = time.time()
-        session["players_ready"] = set()
-        
-        # Transmite nova questão
-        question_to_send = {
-            "question": question_data["question"],
-            "options": question_data["options"],
-            "oracle_hint": question_data.get("oracle_hint", "")
-        }
+        session.reset_round(time.time())
         
         await websocket_manager.broadcast_to_session(session_id, {
             "event": "memory_stick_used",
@@ -323,81 +330,80 @@ class GameLogic:
             "message": "💾 Pente de Memória ativado! Carregando uma nova questão..."
         })
         
-        await asyncio.sleep(1)
-        
-        await websocket_manager.broadcast_to_session(session_id, {
-            "event": "new_question",
-            "index": idx + 1,
-            "total": len(session["questions"]),
-            "question": question_to_send,
-            "memory_stick_used": True
-        })
+        # Transmite nova questão
+        session_scheduler.call_later(1, session_id, websocket_manager.broadcast_text, session_id,
+                                     self.new_question_text(idx, len(session.questions), question_data, True))
     
     async def handle_ready_next(self, session_id: str, player_name: str):
         session = session_manager.get_session(session_id)
         if not session:
             return
             
-        session["players_ready"].add(player_name)
+        slot = session.slot(player_name)
+        if slot < 0 or not session.mark_ready(slot):
+            return
+        
+        total_ready = session.ready_count
+        
+        # Decide antes de qualquer await: só o handler que completa o grupo avança a rodada
+        all_ready = total_ready >= len(session.players)
         
-        print(f"{player_name} pronto para próxima questão. Total pronto: {len(session['players_ready'])}")
+        logger.debug("%s pronto para próxima questão. Total pronto: %d", player_name, total_ready)
         
         await websocket_manager.broadcast_to_session(session_id, {
             "event": "player_ready",
             "player": player_name,
-            "total_ready": len(session["players_ready"])
+            "total_ready": total_ready
         })
         
-        if len(session["players_ready"]) >= len(session["players"]):
+        if all_ready:
             await websocket_manager.broadcast_to_session(session_id, {
                 "event": "both_ready"
             })
             
-            await asyncio.sleep(2)
-            
-            session["current_index"] += 1
-            
-            if session["current_index"] < len(session["questions"]):
-                await self.send_question(session_id)
-            else:
-                await self._handle_game_over(session_id)
+            session_scheduler.call_later(2, session_id, self._advance_round, session_id)
+    
+    async def _advance_round(self, session_id: str):
+        """Passa para a próxima questão ou encerra o jogo (agendado após both_ready)"""
+        session = session_manager.get_session(session_id)
+        if not session:
+            return
+        
+        session.current_index += 1
+        
+        if session.current_index < len(session.questions):
+            await self.send_question(session_id)
+        else:
+            await self._handle_game_over(session_id)
     
     async def _handle_game_over(self, session_id: str):
         session = session_manager.get_session(session_id)
-        final_scores = session["scores"]
+        session_manager.set_status(session_id, FINISHED)
+        final_scores = session.scores_dict()
         max_score = max(final_scores.values()) if final_scores.values() else 0
         winners = [p for p, s in final_scores.items() if s == max_score]
         
-        await self._save_game_results(session_id, final_scores, winners)
+        self._save_game_results(session_id, final_scores, winners)
         
         await websocket_manager.broadcast_to_session(session_id, {
             "event": "game_over",
             "final_scores": final_scores,
-            "final_streaks": session["streaks"],
+            "final_streaks": session.streaks_dict(),
             "winners": winners,
             "is_tie": len(winners) > 1
         })
     
-    async def _save_game_results(self, session_id: str, final_scores: dict, winners: list):
-        """Salva resultados do jogo no banco de dados"""
+    def _save_game_results(self, session_id: str, final_scores: dict, winners: list):
+        """Enfileira os resultados do jogo para gravação em lote no banco de dados"""
         try:
-            match_id = db_manager.create_match()
-            
-            question_ids = []
-            if "questions" in session_manager.get_session(session_id):
-                question_ids = [q.get("id") for q in session_manager.get_session(session_id)["questions"] if q.get("id")]
-            
-            if question_ids:
-                db_manager.add_questions_to_match(match_id, question_ids)
-            
-            for player_name, score in final_scores.items():
-                player_id = db_manager.get_or_create_player(player_name)
-                won = player_name in winners
-                db_manager.save_match_result(match_id, player_id, score, won)
+            session = session_manager.get_session(session_id)
+            question_ids = [q.get("id") for q in session.questions if q.get("id")]
             
-            print(f"Resultados do jogo salvos no banco de dados para partida {match_id}")
+            results = [(player_name, score, player_name in winners) for player_name, score in final_scores.items()]
+            match_persister.enqueue(question_ids, results)
+            seen_questions.record(final_scores, question_ids)
             
         except Exception as e:
-            print(f"Erro ao salvar resultados do jogo: {e}")
+            logger.exception("Erro ao salvar resultados do jogo: %s", e)
 
 game_logic = GameLogic()
\ No newline at end of file
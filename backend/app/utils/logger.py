@@ -0,0 +1,55 @@
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+import logging
+import os
+import queue
+import sys
+
+# Subsistemas com logger e nível próprios: compquest.<subsistema>
+SUBSYSTEMS = ("app", "game", "ws", "db", "session", "routes")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Logger do subsistema (ex.: get_logger("game") -> compquest.game)"""
+    return logging.getLogger(f"compquest.{subsystem}")
+
+def setup_logging(stream=None) -> QueueListener:
+    """Configura o logging sem bloqueio do event loop
+
+    Os loggers compquest.* só colocam os registros numa fila (QueueHandler); a
+    escrita no stream acontece numa thread em segundo plano (QueueListener).
+    O nível geral vem de COMPQUEST_LOG_LEVEL (padrão INFO) e cada subsistema pode
+    ser ajustado com COMPQUEST_LOG_LEVEL_<SUBSISTEMA>, ex.: COMPQUEST_LOG_LEVEL_GAME=DEBUG.
+    Os logs de debug do caminho quente ficam desligados por padrão.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger("compquest")
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(os.getenv("COMPQUEST_LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+
+    for subsystem in SUBSYSTEMS:
+        level = os.getenv(f"COMPQUEST_LOG_LEVEL_{subsystem.upper()}")
+        get_logger(subsystem).setLevel(level.upper() if level else logging.NOTSET)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Esvazia a fila de logs e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger("compquest").handlers.clear()
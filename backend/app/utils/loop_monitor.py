@@ -0,0 +1,47 @@
+from typing import Optional
+from .metrics import metrics
+import asyncio
+import os
+
+class LoopLagMonitor:
+    """Mede o atraso do event loop
+
+    Uma tarefa dorme `interval` segundos e registra quanto acordou depois do
+    previsto: esse excedente é o tempo que callbacks bloqueantes seguraram o loop.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lag = metrics.histogram(
+            "compquest_event_loop_lag_seconds",
+            "Atraso do event loop em relação ao horário previsto de cada verificação",
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+        )
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, lag)
+            self._lag.observe(lag)
+
+loop_monitor = LoopLagMonitor(interval=float(os.getenv("COMPQUEST_LOOP_LAG_INTERVAL", "0.5")))
+
+metrics.gauge("compquest_event_loop_lag_max_seconds", "Maior atraso do event loop observado", lambda: loop_monitor.max_lag)
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+from ..database import async_db_manager
+from .batch_writer import BatchWriter
+from .metrics import metrics
+
+class MatchPersister(BatchWriter):
+    """Persistência write-behind das partidas finalizadas
+
+    As partidas terminadas ficam numa fila em memória e são gravadas em lote,
+    numa única transação, quando a fila atinge `batch_size` ou a cada
+    `flush_interval` segundos. Ao desligar o servidor a fila é esvaziada.
+    """
+
+    item_name = "partidas"
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0, max_attempts: int = 3):
+        super().__init__(batch_size, flush_interval, max_attempts)
+
+    def enqueue(self, question_ids: List[int], results: List[tuple]):
+        """Enfileira uma partida finalizada; results é uma lista de (jogador, score, venceu)"""
+        self._add({
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "question_ids": question_ids,
+            "results": results
+        })
+
+    async def write(self, batch: List[Dict[str, Any]]):
+        await async_db_manager.save_finished_matches(batch)
+
+match_persister = MatchPersister(
+    batch_size=int(os.getenv("COMPQUEST_MATCH_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("COMPQUEST_MATCH_FLUSH_INTERVAL", "1.0"))
+)
+
+metrics.gauge("compquest_match_writer_pending", "Partidas finalizadas aguardando gravação", lambda: match_persister.pending)
+metrics.counter("compquest_match_writer_saved_total", "Partidas gravadas no banco", lambda: match_persister.saved)
+metrics.counter("compquest_match_writer_failures_total", "Lotes de partidas que falharam ao gravar", lambda: match_persister.failures)
+metrics.counter("compquest_match_writer_dropped_total", "Partidas descartadas após esgotar as tentativas", lambda: match_persister.dropped)
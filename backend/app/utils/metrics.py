@@ -0,0 +1,118 @@
+from typing import Callable, Dict, List, Optional, Sequence
+from bisect import bisect_left
+import math
+
+# Limites (em segundos) dos buckets padrão dos histogramas de latência
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class _HistogramSeries:
+    """Contagens de um histograma para um valor de label"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Só incrementa o bucket exato; os acumulados são calculados na coleta
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram:
+    """Histograma de latência no formato Prometheus, com no máximo um label"""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS, label: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series: Dict[Optional[str], _HistogramSeries] = {}
+
+    def labels(self, value: str) -> _HistogramSeries:
+        series = self._series.get(value)
+        if series is None:
+            series = self._series[value] = _HistogramSeries(self.buckets)
+        return series
+
+    def observe(self, value: float):
+        self.labels(None).observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, series in list(self._series.items()):
+            base = f'{self.label}="{_escape(label_value)}",' if self.label and label_value is not None else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}le="{_format_value(bound)}"}} {cumulative}')
+            suffix = f"{{{base.rstrip(',')}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{suffix} {series.count}")
+        return lines
+
+class CallbackMetric:
+    """Gauge ou counter cujo valor é lido de uma função no momento da coleta
+
+    A função retorna um número ou, se a métrica tiver label, um dicionário
+    {valor do label: número}. Assim os contadores já mantidos pelos componentes
+    são expostos sem custo extra no caminho quente.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable, label: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.label = label
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        if self.label:
+            for label_value, v in value.items():
+                lines.append(f'{self.name}{{{self.label}="{_escape(label_value)}"}} {_format_value(v)}')
+        else:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS, label: Optional[str] = None) -> Histogram:
+        return self._register(Histogram(name, help, buckets, label))
+
+    def gauge(self, name: str, help: str, fn: Callable, label: Optional[str] = None) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, "gauge", fn, label))
+
+    def counter(self, name: str, help: str, fn: Callable, label: Optional[str] = None) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, "counter", fn, label))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# erro ao coletar {metric.name}: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
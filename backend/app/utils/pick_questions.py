@@ -1,44 +1,33 @@
-import random
-from ..database import db_manager
+from typing import Iterable
+from .question_bank import question_bank
+from .seen_questions import seen_questions
+from .logger import get_logger
 
-def pick_questions():
-    """Pick questions from database: 4 easy, 4 medium, 2 hard"""
+logger = get_logger("game")
+
+def pick_questions(players: Iterable[str] = ()):
+    """Pick questions from the in-memory question bank: 4 easy, 4 medium, 2 hard
+
+    Questions already seen by any of the players are avoided while unseen ones remain.
+    """
     try:
-        easy = db_manager.get_questions_by_difficulty("facil", 4)
-        medium = db_manager.get_questions_by_difficulty("medio", 4)
-        hard = db_manager.get_questions_by_difficulty("dificil", 2)
-        
-        print(f"Picked questions - Easy: {len(easy)}, Medium: {len(medium)}, Hard: {len(hard)}")
-        
-        questions = []
-        
-        for q in easy + medium + hard:
-            correct_answer = None
-            options = []
-            
-            for option in q['options']:
-                options.append(option['text'])
-                if option['correct']:
-                    correct_answer = option['text']
-            
-            question_data = {
-                "question": q['question'],
-                "options": options,
-                "answer": correct_answer,
-                "oracle_hint": q['hint'],
-                "explanation": q['explanation'],
-                "id": q['id'] 
-            }
-            questions.append(question_data)
-        
-        print(f"Total questions prepared: {len(questions)}")
-        
+        question_bank.ensure_loaded()
+        seen = [seen_questions.get(player_name) for player_name in players]
+
+        easy = question_bank.sample_unseen("facil", 4, seen)
+        medium = question_bank.sample_unseen("medio", 4, seen)
+        hard = question_bank.sample_unseen("dificil", 2, seen)
+
+        logger.debug("Picked questions - Easy: %d, Medium: %d, Hard: %d", len(easy), len(medium), len(hard))
+
+        questions = easy + medium + hard
+
+        logger.debug("Total questions prepared: %d", len(questions))
+
         if len(questions) == 0:
-            print("WARNING: No questions found in database! Check if questions are loaded.")
-        
+            logger.warning("No questions found in database! Check if questions are loaded.")
+
         return questions
     except Exception as e:
-        print(f"ERROR in pick_questions: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in pick_questions: %s", e)
         return []
@@ -0,0 +1,167 @@
+import random
+import threading
+from typing import Dict, List, Iterable, Optional, Any, Sequence
+from ..database import db_manager
+from .seen_questions import SeenQuestions
+from . import serializer
+
+DIFFICULTIES = ("facil", "medio", "dificil")
+
+class QuestionBank:
+    """Índice em memória de todas as questões, agrupadas por dificuldade.
+
+    É carregado uma única vez (na inicialização do servidor) e guarda as questões
+    já no formato usado pelas sessões, de modo que sortear questões não faz
+    nenhuma consulta ao banco de dados. As questões devolvidas são compartilhadas
+    entre sessões e não devem ser modificadas.
+
+    A parte pública de cada questão (enunciado, opções e dica) também fica
+    pré-codificada em JSON, pronta para ser embutida no evento new_question.
+    """
+
+    def __init__(self):
+        self.by_difficulty: Dict[str, List[dict]] = {d: [] for d in DIFFICULTIES}
+        self.by_id: Dict[int, dict] = {}
+        self.frames: Dict[int, str] = {}
+        self.masks: Dict[str, int] = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, questions: Optional[List[Dict[str, Any]]] = None):
+        """(Re)carrega o índice a partir do banco de dados (ou de uma lista já obtida)"""
+        if questions is None:
+            questions = db_manager.get_all_questions()
+
+        by_difficulty = {d: [] for d in DIFFICULTIES}
+        by_id = {}
+        frames = {}
+        for q in questions:
+            question_data = self._to_session_question(q)
+            by_difficulty.setdefault(q['difficulty'], []).append(question_data)
+            by_id[question_data['id']] = question_data
+            frames[question_data['id']] = self._encode_frame(question_data)
+
+        # Bitmap dos IDs de cada dificuldade, para o sorteio de questões não vistas
+        masks = {}
+        for difficulty, pool in by_difficulty.items():
+            bitmap = bytearray()
+            SeenQuestions._set_bits(bitmap, (q['id'] for q in pool))
+            masks[difficulty] = int.from_bytes(bitmap, "little")
+
+        # Troca as referências de uma vez para que leitores nunca vejam um índice parcial
+        self.by_difficulty = by_difficulty
+        self.masks = masks
+        self.by_id = by_id
+        self.frames = frames
+        self.loaded = True
+
+    def ensure_loaded(self):
+        """Carrega o índice no primeiro uso caso a inicialização não o tenha feito"""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def count(self, difficulty: str) -> int:
+        return len(self.by_difficulty.get(difficulty, []))
+
+    def sample(self, difficulty: str, k: int, exclude_ids: Iterable[int] = ()) -> List[dict]:
+        """Sorteia até k questões distintas de uma dificuldade em O(k + len(exclude_ids))
+
+        Sorteia alguns candidatos a mais (um por id excluído) e descarta os excluídos,
+        o que garante k resultados sempre que houver questões suficientes no pool.
+        """
+        pool = self.by_difficulty.get(difficulty, [])
+        exclude = set(exclude_ids)
+        candidates = random.sample(pool, min(len(pool), k + len(exclude)))
+        if exclude:
+            candidates = [q for q in candidates if q['id'] not in exclude]
+        return candidates[:k]
+
+    def sample_unseen(self, difficulty: str, k: int, seen: Sequence[bytearray] = (),
+                      exclude_ids: Iterable[int] = ()) -> List[dict]:
+        """Sorteia até k questões que nenhum dos bitmaps `seen` marca como vistas
+
+        Sorteia posições ao acaso e descarta as vistas, com um limite de tentativas
+        proporcional a k, então o custo é O(k) enquanto houver questões novas.
+        Se o limite estourar (pool quase todo visto), calcula as que restam com
+        operações de bits sobre o pool inteiro e, esgotadas, completa com questões
+        já vistas.
+        """
+        pool = self.by_difficulty.get(difficulty, [])
+        exclude = set(exclude_ids)
+        has = SeenQuestions.has
+        chosen: List[dict] = []
+        chosen_ids = set()
+
+        def fresh(q: dict) -> bool:
+            question_id = q['id']
+            return (question_id not in chosen_ids and question_id not in exclude
+                    and not any(has(bitmap, question_id) for bitmap in seen))
+
+        if pool:
+            for _ in range(4 * k + 16):
+                q = pool[random.randrange(len(pool))]
+                if fresh(q):
+                    chosen.append(q)
+                    chosen_ids.add(q['id'])
+                    if len(chosen) == k:
+                        return chosen
+
+        # Poucas questões novas: calcula as que restam com operações sobre os bitmaps inteiros
+        taken = 0
+        for bitmap in seen:
+            taken |= int.from_bytes(bitmap, "little")
+        for question_id in chosen_ids | exclude:
+            taken |= 1 << question_id
+        remaining = self._bit_positions(self.masks.get(difficulty, 0) & ~taken)
+        for question_id in random.sample(remaining, min(len(remaining), k - len(chosen))):
+            chosen.append(self.by_id[question_id])
+            chosen_ids.add(question_id)
+        if len(chosen) < k:
+            # Pool esgotado para esses jogadores: repete questões já vistas
+            chosen += self.sample(difficulty, k - len(chosen), exclude_ids=chosen_ids | exclude)
+        return chosen
+
+    @staticmethod
+    def _bit_positions(mask: int) -> List[int]:
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        return [i * 8 + bit for i, byte in enumerate(data) if byte for bit in range(8) if byte >> bit & 1]
+
+    def frame(self, question: dict) -> str:
+        """JSON da parte pública da questão (sem a resposta), codificado uma única vez"""
+        question_id = question.get("id")
+        # A identidade garante que o frame é da mesma versão da questão (o banco pode ter sido recarregado)
+        if self.by_id.get(question_id) is question:
+            return self.frames[question_id]
+        return self._encode_frame(question)
+
+    @staticmethod
+    def _encode_frame(question: dict) -> str:
+        return serializer.dumps({
+            "question": question["question"],
+            "options": question["options"],
+            "oracle_hint": question.get("oracle_hint", "")
+        })
+
+    @staticmethod
+    def _to_session_question(q: Dict[str, Any]) -> dict:
+        """Converte uma questão do banco para o formato armazenado nas sessões"""
+        correct_answer = None
+        options = []
+
+        for option in q['options']:
+            options.append(option['text'])
+            if option['correct']:
+                correct_answer = option['text']
+
+        return {
+            "question": q['question'],
+            "options": options,
+            "answer": correct_answer,
+            "oracle_hint": q['hint'],
+            "explanation": q['explanation'],
+            "id": q['id']
+        }
+
+question_bank = QuestionBank()
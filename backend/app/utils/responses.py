@@ -0,0 +1,9 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from .serializer import dumps_bytes
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que codifica com o serializer do projeto (orjson quando instalado)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
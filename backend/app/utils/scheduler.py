@@ -0,0 +1,113 @@
+from typing import Dict, Set, Optional, Callable, Awaitable
+import asyncio
+import heapq
+import itertools
+from .logger import get_logger
+
+logger = get_logger("session")
+
+class ScheduledStep:
+    """Passo agendado de uma sessão; cancel() impede que ele seja executado"""
+    __slots__ = ("when", "session_id", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, session_id: str, callback: Callable[..., Awaitable], args: tuple):
+        self.when = when
+        self.session_id = session_id
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class SessionScheduler:
+    """Agendador central dos passos atrasados das sessões
+
+    Em vez de cada handler dormir com asyncio.sleep (prendendo o laço de
+    recebimento do WebSocket), os passos como "enviar round_result em 1.5s" são
+    colocados num heap ordenado pelo horário. Uma única tarefa dorme até o
+    próximo vencimento e dispara os passos vencidos, então milhares de sessões
+    compartilham um só timer.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._by_session: Dict[str, Set[ScheduledStep]] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def call_later(self, delay: float, session_id: str, callback: Callable[..., Awaitable], *args) -> ScheduledStep:
+        """Agenda `await callback(*args)` para daqui a `delay` segundos"""
+        self._ensure_running()
+        step = ScheduledStep(self._loop.time() + delay, session_id, callback, args)
+        heapq.heappush(self._heap, (step.when, next(self._counter), step))
+        self._by_session.setdefault(session_id, set()).add(step)
+
+        # Só precisa acordar o timer se o novo passo for o próximo a vencer
+        if self._heap[0][2] is step:
+            self._wakeup.set()
+        return step
+
+    def cancel_session(self, session_id: str):
+        """Cancela todos os passos pendentes de uma sessão"""
+        for step in self._by_session.pop(session_id, ()):
+            step.cancel()
+
+    def pending(self) -> int:
+        return sum(len(steps) for steps in self._by_session.values())
+
+    async def stop(self):
+        """Descarta os passos pendentes e encerra o timer"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._heap.clear()
+        self._by_session.clear()
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = self._loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, step = heapq.heappop(self._heap)
+                self._discard(step)
+                if not step.cancelled:
+                    task = self._loop.create_task(self._fire(step))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _discard(self, step: ScheduledStep):
+        steps = self._by_session.get(step.session_id)
+        if steps is not None:
+            steps.discard(step)
+            if not steps:
+                del self._by_session[step.session_id]
+
+    @staticmethod
+    async def _fire(step: ScheduledStep):
+        try:
+            await step.callback(*step.args)
+        except Exception as e:
+            logger.exception("Erro ao executar passo agendado da sessão %s: %s", step.session_id, e)
+
+session_scheduler = SessionScheduler()
@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+from ..database import db_manager
+from .metrics import metrics
+
+class SeenQuestions:
+    """Questões já vistas por cada jogador, em bitmaps compactos
+
+    Cada jogador tem um bytearray em que o bit i indica que a questão de ID i já
+    apareceu numa partida dele (1 bit por questão: 50k questões cabem em ~6 KB).
+    O bitmap é montado no primeiro uso a partir de contem ⨝ joga (ensure_loaded,
+    bloqueante, deve rodar no executor do banco) e atualizado em memória a cada
+    partida finalizada (record), inclusive antes de a partida ser gravada.
+
+    Guarda no máximo `max_players` jogadores, descartando os usados há mais tempo;
+    um jogador descartado é recarregado do banco quando voltar.
+    """
+
+    EMPTY = bytearray()
+
+    def __init__(self, max_players: int = 10_000):
+        self.max_players = max_players
+        self._bitmaps: "OrderedDict[str, bytearray]" = OrderedDict()
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.loads = 0
+        self.evicted = 0
+
+    def is_loaded(self, player_name: str) -> bool:
+        return player_name in self._loaded
+
+    def ensure_loaded(self, player_name: str):
+        """Monta o bitmap do jogador a partir do histórico no banco, se ainda não estiver em memória"""
+        with self._lock:
+            if player_name in self._loaded:
+                self._bitmaps.move_to_end(player_name)
+                return
+
+        question_ids = db_manager.get_seen_question_ids(player_name)
+
+        with self._lock:
+            # Partidas registradas enquanto a consulta rodava já estão no bitmap: apenas soma
+            bitmap = self._bitmaps.setdefault(player_name, bytearray())
+            self._set_bits(bitmap, question_ids)
+            self._loaded.add(player_name)
+            self._bitmaps.move_to_end(player_name)
+            self.loads += 1
+            self._evict()
+
+    def record(self, player_names: Iterable[str], question_ids: List[int]):
+        """Marca as questões de uma partida finalizada como vistas pelos jogadores"""
+        with self._lock:
+            for player_name in player_names:
+                bitmap = self._bitmaps.setdefault(player_name, bytearray())
+                self._set_bits(bitmap, question_ids)
+                self._bitmaps.move_to_end(player_name)
+            self._evict()
+
+    def get(self, player_name: str) -> bytearray:
+        """Bitmap do jogador (vazio se desconhecido); não deve ser modificado"""
+        return self._bitmaps.get(player_name, self.EMPTY)
+
+    def any_seen(self, player_names: Iterable[str], question_ids: List[int]) -> bool:
+        """Indica se algum dos jogadores já viu alguma das questões"""
+        for player_name in player_names:
+            bitmap = self.get(player_name)
+            if bitmap and any(self.has(bitmap, question_id) for question_id in question_ids):
+                return True
+        return False
+
+    @staticmethod
+    def has(bitmap: bytearray, question_id: int) -> bool:
+        byte = question_id >> 3
+        return byte < len(bitmap) and bool(bitmap[byte] >> (question_id & 7) & 1)
+
+    @staticmethod
+    def _set_bits(bitmap: bytearray, question_ids: Iterable[int]):
+        for question_id in question_ids:
+            byte = question_id >> 3
+            if byte >= len(bitmap):
+                bitmap.extend(bytes(byte + 1 - len(bitmap)))
+            bitmap[byte] |= 1 << (question_id & 7)
+
+    def _evict(self):
+        while len(self._bitmaps) > self.max_players:
+            player_name, _ = self._bitmaps.popitem(last=False)
+            self._loaded.discard(player_name)
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "players": len(self._bitmaps),
+                "bytes": sum(len(bitmap) for bitmap in self._bitmaps.values()),
+                "loads": self.loads,
+                "evicted": self.evicted
+            }
+
+seen_questions = SeenQuestions(max_players=int(os.getenv("COMPQUEST_SEEN_CACHE_PLAYERS", "10000")))
+
+metrics.gauge("compquest_seen_players", "Jogadores com bitmap de questões vistas em memória", lambda: len(seen_questions._bitmaps))
+metrics.counter("compquest_seen_loads_total", "Bitmaps de questões vistas montados a partir do banco", lambda: seen_questions.loads)
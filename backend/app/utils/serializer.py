@@ -0,0 +1,31 @@
+from typing import Any, Union
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Codificador em uso: "orjson" quando instalado, senão a biblioteca padrão
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    def dumps_bytes(obj: Any) -> bytes:
+        """Codifica em JSON compacto (UTF-8, sem escapar acentos)"""
+        return orjson.dumps(obj)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj: Any) -> bytes:
+        """Codifica em JSON compacto (UTF-8, sem escapar acentos)"""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
@@ -1,66 +1,307 @@
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 from fastapi import WebSocket
+from .session_state import GameSession, WAITING, READY, FINISHED
+from .scheduler import session_scheduler
+from .session_store import MemorySessionStore, create_session_store, owner_of
+from ..database import async_db_manager
+from .metrics import metrics
+from . import serializer
+from .logger import get_logger
+import asyncio
+import os
+import time
 import uuid
 
+logger = get_logger("session")
+
+# Estado usado para TTL de sessões "ready" sem nenhum WebSocket conectado
+ABANDONED = "abandoned"
+
+# Código de fechamento (going away) dos WebSockets de uma sessão removida
+SESSION_EXPIRED_CLOSE_CODE = 1001
+
 class SessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, dict] = {}
+    def __init__(self, ttls: Dict[str, float] = None, max_sessions: int = 100_000, reap_interval: float = 30.0,
+                 store=None, worker_id: Optional[str] = None):
+        # OrderedDict em ordem de uso (LRU): a sessão usada mais recentemente fica no fim
+        self.sessions: "OrderedDict[str, GameSession]" = OrderedDict()
         self.connections: Dict[str, Dict[str, WebSocket]] = {}
-    
-    def create_session(self, player_name: str, questions: list) -> str:
+        # Diretório das sessões aguardando o segundo jogador (fila FIFO), local ou compartilhado entre workers
+        self.store = store if store is not None else MemorySessionStore()
+        # Com worker_id, os IDs de sessão levam o dono como prefixo para o proxy rotear por sessão
+        self.worker_id = worker_id
+        self._background = set()
+
+        # Tempo máximo (em segundos) sem atividade em cada estado antes da remoção
+        self.ttls = {WAITING: 600.0, READY: 1800.0, ABANDONED: 120.0, FINISHED: 60.0}
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_sessions = max_sessions
+        self.reap_interval = reap_interval
+        self.evictions = {WAITING: 0, READY: 0, ABANDONED: 0, FINISHED: 0, "lru": 0}
+        # Contadores por status mantidos a cada transição, para consultas O(1)
+        self.status_counts = {WAITING: 0, READY: 0, FINISHED: 0}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def _store_call(self, fn, *args):
+        """Executa uma operação do diretório de sessões
+        
+        O diretório compartilhado abre transações SQLite que podem esperar pelo
+        lock de outro worker (busy timeout), então roda no executor do banco; o
+        local é um dicionário e roda direto.
+        """
+        if self.store.shared:
+            return await async_db_manager.run(fn, *args)
+        return fn(*args)
+
+    def _store_background(self, fn, *args):
+        """Operação do diretório cujo resultado não é esperado (remoções), sem bloquear quem chamou"""
+        if not self.store.shared:
+            fn(*args)
+            return
+        task = asyncio.create_task(async_db_manager.run(fn, *args))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Erro no diretório de sessões: %s", task.exception())
+
+    async def create_session(self, player_name: str, questions: list) -> str:
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "players": [player_name],
-            "status": "waiting",
-            "questions": questions,
-            "current_index": 0,
-            "scores": {player_name: 0},
-            "streaks": {player_name: 0},
-            "has_used_turing": {player_name: False},
-            "has_used_memory_stick": {player_name: False},
-            "round_answered": False,
-            "round_winner": None,
-            "round_answer": None,
-            "round_start_time": None,
-            "players_ready": set()
-        }
+        if self.worker_id is not None:
+            session_id = f"{self.worker_id}.{session_id}"
+        # Registra localmente antes de publicar no diretório: uma entrada por outro pedido
+        # logo após a publicação precisa encontrar a sessão
+        self.sessions[session_id] = GameSession(player_name, questions)
+        self.status_counts[WAITING] += 1
+        try:
+            await self._store_call(self.store.add_waiting, session_id, player_name)
+        except BaseException:
+            # Sem o registro no diretório ninguém entraria na sessão: desfaz o estado local
+            if self.sessions.pop(session_id, None) is not None:
+                self.status_counts[WAITING] -= 1
+            raise
+
+        # Limite rígido: remove as sessões menos usadas recentemente
+        while len(self.sessions) > self.max_sessions:
+            oldest_id = next(iter(self.sessions))
+            self.evict(oldest_id, "lru")
         return session_id
-    
-    def add_player_to_session(self, session_id: str, player_name: str) -> bool:
-        if session_id not in self.sessions:
+
+    async def add_player_to_session(self, session_id: str, player_name: str) -> Optional[List[str]]:
+        """Coloca o jogador na sessão e retorna os jogadores, ou None se não houver vaga
+
+        A vaga é ocupada no diretório de sessões, então funciona mesmo quando a
+        sessão pertence a outro worker; nesse caso o dono aplica a entrada depois
+        (ver sync_session).
+        """
+        session = self.sessions.get(session_id)
+        if session is not None and (len(session.players) >= 2 or player_name in session.players):
+            return None
+        players = await self._store_call(self.store.join, session_id, player_name)
+        if players is not None and session is not None:
+            self._apply_join(session, player_name)
+        return players
+
+    async def sync_session(self, session_id: str) -> bool:
+        """Aplica a entrada feita por outro worker; retorna True se a sessão ficou pronta agora"""
+        session = self.sessions.get(session_id)
+        if session is None or session.status != WAITING:
             return False
-        
-        session = self.sessions[session_id]
-        if len(session["players"]) >= 2 or player_name in session["players"]:
+        player_name = await self._store_call(self.store.take_joined, session_id)
+        if player_name is None or session.status != WAITING:
             return False
-        
-        session["players"].append(player_name)
-        session["scores"][player_name] = 0
-        session["streaks"][player_name] = 0
-        session["has_used_turing"][player_name] = False
-        session["has_used_memory_stick"][player_name] = False
-        
-        if len(session["players"]) == 2:
-            session["status"] = "ready"
-        
-        return True
-    
-    def get_session(self, session_id: str) -> dict:
-        return self.sessions.get(session_id)
-    
+        self._apply_join(session, player_name)
+        return session.status == READY
+
+    def _apply_join(self, session: GameSession, player_name: str):
+        previous = session.status
+        session.add_player(player_name)
+        if session.status != previous:
+            self._count_transition(previous, session.status)
+
+    def owns(self, session_id: str) -> bool:
+        """Indica se a sessão pertence a este worker (IDs sem prefixo pertencem a todos)"""
+        owner = owner_of(session_id)
+        return owner is None or owner == self.worker_id
+
+    def set_status(self, session_id: str, status: str):
+        """Altera o status da sessão mantendo os contadores e o índice de espera"""
+        session = self.sessions.get(session_id)
+        if session is None or session.status == status:
+            return
+        if session.status == WAITING:
+            self._store_background(self.store.discard, session_id)
+        self._count_transition(session.status, status)
+        session.status = status
+
+    def _count_transition(self, previous: str, status: str):
+        self.status_counts[previous] -= 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    async def claim_waiting_session(self, player_name: str) -> Optional[Tuple[str, List[str]]]:
+        """Coloca o jogador na sessão em espera mais antiga e retorna (ID, jogadores) ou None
+
+        Ignora apenas as sessões criadas pelo próprio jogador, então o custo é O(1)
+        no caso comum. A escolha e a entrada são atômicas no diretório de sessões,
+        logo dois pedidos concorrentes (mesmo em workers diferentes) nunca ocupam
+        a mesma vaga.
+        """
+        claimed = await self._store_call(self.store.claim, player_name)
+        if claimed is None:
+            return None
+        session_id, players = claimed
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._apply_join(session, player_name)
+        return session_id, players
+
+    def get_session(self, session_id: str) -> Optional[GameSession]:
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_activity = time.monotonic()
+            self.sessions.move_to_end(session_id)
+        return session
+
     def add_connection(self, session_id: str, player_name: str, websocket: WebSocket):
         if session_id not in self.connections:
             self.connections[session_id] = {}
         self.connections[session_id][player_name] = websocket
-    
-    def remove_connection(self, session_id: str, player_name: str):
-        if session_id in self.connections and player_name in self.connections[session_id]:
-            del self.connections[session_id][player_name]
-    
+
+    def remove_connection(self, session_id: str, player_name: str, websocket: WebSocket = None):
+        """Remove a conexão do jogador; se websocket for informado, só remove se ainda for a mesma"""
+        connections = self.connections.get(session_id)
+        if connections is None or player_name not in connections:
+            return
+        if websocket is not None and connections[player_name] is not websocket:
+            return
+        del connections[player_name]
+
+        session = self.sessions.get(session_id)
+        if session is not None:
+            # O TTL de sessão abandonada conta a partir da última desconexão
+            session.last_activity = time.monotonic()
+        if not connections and session is None:
+            del self.connections[session_id]
+
     def get_connections(self, session_id: str) -> Dict[str, WebSocket]:
         return self.connections.get(session_id, {})
-    
+
     def get_available_sessions(self) -> list:
-        return [(sid, s) for sid, s in self.sessions.items() if s["status"] == "waiting"]
+        return [(sid, self.sessions[sid]) for sid in self.store.waiting_ids() if sid in self.sessions]
+
+    def evict(self, session_id: str, reason: str):
+        """Remove a sessão, suas conexões e seus passos agendados"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        self.status_counts[session.status] -= 1
+        if session.status == WAITING:
+            self._store_background(self.store.discard, session_id)
+        sockets = self.connections.pop(session_id, None)
+        if sockets:
+            # Fecha as conexões para os clientes saberem que a sessão acabou (e o laço de recepção terminar)
+            for websocket in sockets.values():
+                task = asyncio.create_task(self._close_expired(websocket, reason))
+                self._background.add(task)
+                task.add_done_callback(self._background_done)
+        session_scheduler.cancel_session(session_id)
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+
+    @staticmethod
+    async def _close_expired(websocket: WebSocket, reason: str):
+        try:
+            await asyncio.wait_for(websocket.send_text(serializer.dumps({
+                "event": "session_expired",
+                "reason": reason,
+                "message": "Sessão encerrada por inatividade ou limite de sessões"
+            })), timeout=1.0)
+        except Exception:
+            pass
+        try:
+            await websocket.close(code=SESSION_EXPIRED_CLOSE_CODE)
+        except Exception:
+            # A conexão já pode estar fechada ou quebrada
+            pass
+
+    def _ttl_state(self, session_id: str, session: GameSession) -> str:
+        if session.status == READY and not self.connections.get(session_id):
+            return ABANDONED
+        return session.status
+
+    def reap(self, now: float = None) -> int:
+        """Remove as sessões que passaram do TTL do seu estado; retorna quantas foram removidas"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        for session_id, session in self.sessions.items():
+            state = self._ttl_state(session_id, session)
+            if now - session.last_activity > self.ttls.get(state, self.ttls[READY]):
+                expired.append((session_id, state))
+
+        for session_id, state in expired:
+            self.evict(session_id, state)
+        # Registros compartilhados deixados por workers que pararam sem limpá-los
+        self._store_background(self.store.expire, time.time() - self.ttls[WAITING])
+        return len(expired)
+
+    def start_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop_reaper(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                removed = self.reap()
+                if removed:
+                    logger.info("Sessões expiradas removidas: %d (restantes: %d)", removed, len(self.sessions))
+            except Exception as e:
+                logger.exception("Erro ao remover sessões expiradas: %s", e)
+
+    def stats(self) -> dict:
+        """Sessões vivas por status e contadores de remoção (O(1), sem percorrer as sessões)"""
+        return {
+            "live": len(self.sessions),
+            "live_by_state": dict(self.status_counts),
+            "max_sessions": self.max_sessions,
+            "evicted": dict(self.evictions)
+        }
+
+# Com o diretório compartilhado todo processo tem um worker_id próprio (o pid, se
+# COMPQUEST_WORKER_ID não for definido) e todo ID de sessão leva esse prefixo
+_store_kind = os.getenv("COMPQUEST_SESSION_STORE", "memory")
+_worker_id = (os.getenv("COMPQUEST_WORKER_ID") or str(os.getpid())) if _store_kind == "shared" else None
+
+session_manager = SessionManager(
+    ttls={
+        WAITING: float(os.getenv("COMPQUEST_SESSION_TTL_WAITING", "600")),
+        READY: float(os.getenv("COMPQUEST_SESSION_TTL_READY", "1800")),
+        ABANDONED: float(os.getenv("COMPQUEST_SESSION_TTL_ABANDONED", "120")),
+        FINISHED: float(os.getenv("COMPQUEST_SESSION_TTL_FINISHED", "60"))
+    },
+    max_sessions=int(os.getenv("COMPQUEST_MAX_SESSIONS", "100000")),
+    reap_interval=float(os.getenv("COMPQUEST_SESSION_REAP_INTERVAL", "30")),
+    store=create_session_store(
+        _store_kind,
+        os.getenv("COMPQUEST_SESSION_STORE_PATH", "/dev/shm/compquest-sessions.db"),
+        _worker_id
+    ),
+    worker_id=_worker_id
+)
 
-session_manager = SessionManager()
\ No newline at end of file
+metrics.gauge("compquest_sessions", "Sessões vivas por status", lambda: session_manager.status_counts, label="status")
+metrics.gauge("compquest_session_connections", "Sessões com ao menos um WebSocket registrado", lambda: len(session_manager.connections))
+metrics.counter("compquest_session_evictions_total", "Sessões removidas por motivo (TTL do estado ou LRU)", lambda: session_manager.evictions, label="reason")
+metrics.gauge("compquest_scheduled_steps", "Passos de sessão agendados e ainda não executados", session_scheduler.pending)
@@ -0,0 +1,112 @@
+from typing import List, Optional
+import time
+
+WAITING = "waiting"
+READY = "ready"
+FINISHED = "finished"
+
+# Poderes especiais: um bit por poder, repetidos por jogador (2 bits por slot)
+TURING = 0b01
+MEMORY_STICK = 0b10
+
+class GameSession:
+    """Estado compacto de uma sessão de jogo
+
+    Usa __slots__ e arrays fixos de dois slots (um por jogador) no lugar do
+    dicionário com sub-dicionários por jogador. Os poderes usados e os jogadores
+    prontos ficam em pequenos inteiros de flags. O formato enviado aos clientes
+    (o dicionário antigo) é gerado sob demanda por to_dict().
+    """
+
+    __slots__ = (
+        "players", "status", "questions", "current_index",
+        "scores", "streaks", "powers", "ready",
+        "round_answered", "round_winner", "round_answer", "round_start_time", "round_time",
+        "last_activity"
+    )
+
+    def __init__(self, player_name: str, questions: list):
+        self.players: List[str] = [player_name]
+        self.status = WAITING
+        self.questions = questions
+        self.current_index = 0
+        self.scores = [0, 0]
+        self.streaks = [0, 0]
+        self.powers = 0
+        self.ready = 0
+        self.round_answered = False
+        self.round_winner: Optional[str] = None
+        self.round_answer: Optional[str] = None
+        self.round_start_time: Optional[float] = None
+        self.round_time: Optional[float] = None
+        self.last_activity = time.monotonic()
+
+    def slot(self, player_name: str) -> int:
+        """Índice do jogador nos arrays da sessão, ou -1 se ele não estiver na sessão"""
+        players = self.players
+        if players[0] == player_name:
+            return 0
+        if len(players) > 1 and players[1] == player_name:
+            return 1
+        return -1
+
+    def add_player(self, player_name: str) -> bool:
+        if len(self.players) >= 2 or player_name in self.players:
+            return False
+        self.players.append(player_name)
+        if len(self.players) == 2:
+            self.status = READY
+        return True
+
+    def has_used(self, slot: int, power: int) -> bool:
+        return bool(self.powers & (power << (2 * slot)))
+
+    def mark_used(self, slot: int, power: int):
+        self.powers |= power << (2 * slot)
+
+    def mark_ready(self, slot: int) -> bool:
+        """Marca o jogador como pronto; retorna False se ele já estava pronto"""
+        bit = 1 << slot
+        if self.ready & bit:
+            return False
+        self.ready |= bit
+        return True
+
+    @property
+    def ready_count(self) -> int:
+        return bin(self.ready).count("1")
+
+    def reset_round(self, start_time: float):
+        self.round_answered = False
+        self.round_winner = None
+        self.round_answer = None
+        self.round_start_time = start_time
+        self.ready = 0
+
+    def scores_dict(self) -> dict:
+        return {name: self.scores[i] for i, name in enumerate(self.players)}
+
+    def streaks_dict(self) -> dict:
+        return {name: self.streaks[i] for i, name in enumerate(self.players)}
+
+    def to_dict(self) -> dict:
+        """Serializa no formato de sessão usado pela API e pelos eventos WebSocket"""
+        players = self.players
+        data = {
+            "players": list(players),
+            "status": self.status,
+            "questions": self.questions,
+            "current_index": self.current_index,
+            "scores": self.scores_dict(),
+            "streaks": self.streaks_dict(),
+            "has_used_turing": {name: self.has_used(i, TURING) for i, name in enumerate(players)},
+            "has_used_memory_stick": {name: self.has_used(i, MEMORY_STICK) for i, name in enumerate(players)},
+            "round_answered": self.round_answered,
+            "round_winner": self.round_winner,
+            "round_answer": self.round_answer,
+            "round_start_time": self.round_start_time,
+            "players_ready": [name for i, name in enumerate(players) if self.ready & (1 << i)]
+        }
+        if self.round_time is not None:
+            data["round_time"] = self.round_time
+        return data
@@ -0,0 +1,226 @@
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import sqlite3
+import threading
+import time
+
+class MemorySessionStore:
+    """Diretório de sessões em espera no próprio processo (padrão, um único worker)
+
+    Guarda só as sessões que aguardam o segundo jogador, em ordem de criação
+    (fila FIFO), com o nome de quem criou. Entrar numa sessão remove-a da fila.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.waiting: "OrderedDict[str, str]" = OrderedDict()
+
+    def add_waiting(self, session_id: str, player_name: str):
+        self.waiting[session_id] = player_name
+
+    def join(self, session_id: str, player_name: str) -> Optional[List[str]]:
+        """Ocupa a vaga da sessão; retorna os jogadores ou None se não houver vaga"""
+        creator = self.waiting.get(session_id)
+        if creator is None or creator == player_name:
+            return None
+        del self.waiting[session_id]
+        return [creator, player_name]
+
+    def claim(self, player_name: str) -> Optional[Tuple[str, List[str]]]:
+        """Ocupa a vaga da sessão em espera mais antiga que não seja do próprio jogador"""
+        for session_id, creator in self.waiting.items():
+            if creator != player_name:
+                del self.waiting[session_id]
+                return session_id, [creator, player_name]
+        return None
+
+    def take_joined(self, session_id: str) -> Optional[str]:
+        # Num único processo toda entrada já é aplicada localmente
+        return None
+
+    def discard(self, session_id: str):
+        self.waiting.pop(session_id, None)
+
+    def expire(self, before: float) -> int:
+        # As sessões locais já são removidas pelo reaper do SessionManager
+        return 0
+
+    def waiting_ids(self) -> List[str]:
+        return list(self.waiting)
+
+class SharedSessionStore:
+    """Diretório de sessões em espera compartilhado entre workers locais
+
+    Usa um arquivo SQLite em memória compartilhada (/dev/shm por padrão) e
+    transações BEGIN IMMEDIATE, então /launch, /join-session e
+    /join-random-session funcionam em qualquer worker. O estado do jogo continua
+    no worker dono da sessão (onde ficam os WebSockets e os timers): quando o
+    segundo jogador entra por outro worker, a entrada fica registrada em
+    sessao_entrada e o dono a aplica ao receber o WebSocket desse jogador.
+
+    Cada processo precisa de um worker_id próprio, reservado em `worker` na
+    criação do store: um ID já em uso por outro processo vivo (por exemplo
+    COMPQUEST_WORKER_ID repetido em `uvicorn --workers N`) é um erro.
+
+    As operações abrem transações com busy timeout e podem esperar por outros
+    workers: o SessionManager as executa no executor do banco, fora do event loop.
+    Por isso cada thread usa a sua própria conexão (uma transação nunca é
+    compartilhada entre threads).
+    """
+
+    shared = True
+
+    def __init__(self, path: str, worker_id: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.worker_id = worker_id
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        # WAL é persistente no arquivo: basta ativá-lo uma vez
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessao_espera (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL UNIQUE,
+                criador TEXT NOT NULL,
+                dono TEXT NOT NULL,
+                criada REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sessao_entrada (
+                session_id TEXT PRIMARY KEY,
+                jogador TEXT NOT NULL,
+                criada REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS worker (
+                id TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                iniciado REAL NOT NULL
+            );
+        """)
+        self._register_worker()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Conexão da thread atual, aberta no primeiro uso"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            # Arquivo em tmpfs: não há o que sincronizar em disco
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _immediate(self):
+        """Transação BEGIN IMMEDIATE na conexão da thread; retorna o cursor"""
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def _register_worker(self):
+        """Reserva o worker_id para este processo; falha se outro processo vivo já o usa"""
+        with self._immediate() as cursor:
+            cursor.execute("SELECT pid FROM worker WHERE id = ?", (self.worker_id,))
+            row = cursor.fetchone()
+            if row is not None and row[0] != os.getpid() and _process_alive(row[0]):
+                raise RuntimeError(
+                    f"worker_id '{self.worker_id}' já está em uso pelo processo {row[0]}; "
+                    "cada processo precisa de um COMPQUEST_WORKER_ID próprio (ou nenhum, para usar o pid)"
+                )
+            cursor.execute(
+                "INSERT OR REPLACE INTO worker (id, pid, iniciado) VALUES (?, ?, ?)",
+                (self.worker_id, os.getpid(), time.time())
+            )
+
+    def add_waiting(self, session_id: str, player_name: str):
+        self.conn.execute(
+            "INSERT INTO sessao_espera (session_id, criador, dono, criada) VALUES (?, ?, ?, ?)",
+            (session_id, player_name, self.worker_id, time.time())
+        )
+
+    def join(self, session_id: str, player_name: str) -> Optional[List[str]]:
+        """Ocupa a vaga da sessão; retorna os jogadores ou None se não houver vaga"""
+        with self._immediate() as cursor:
+            cursor.execute("SELECT criador, dono FROM sessao_espera WHERE session_id = ?", (session_id,))
+            row = cursor.fetchone()
+            if row is None or row[0] == player_name:
+                return None
+            self._seat(cursor, session_id, row[1], player_name)
+        return [row[0], player_name]
+
+    def claim(self, player_name: str) -> Optional[Tuple[str, List[str]]]:
+        """Ocupa a vaga da sessão em espera mais antiga (de qualquer worker) que não seja do próprio jogador"""
+        with self._immediate() as cursor:
+            cursor.execute(
+                "SELECT session_id, criador, dono FROM sessao_espera WHERE criador != ? ORDER BY seq LIMIT 1",
+                (player_name,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            self._seat(cursor, row[0], row[2], player_name)
+        return row[0], [row[1], player_name]
+
+    def _seat(self, cursor: sqlite3.Cursor, session_id: str, owner: str, player_name: str):
+        cursor.execute("DELETE FROM sessao_espera WHERE session_id = ?", (session_id,))
+        if owner != self.worker_id:
+            # O dono aplica a entrada quando o WebSocket do jogador chegar nele
+            cursor.execute(
+                "INSERT OR REPLACE INTO sessao_entrada (session_id, jogador, criada) VALUES (?, ?, ?)",
+                (session_id, player_name, time.time())
+            )
+
+    def take_joined(self, session_id: str) -> Optional[str]:
+        """Retorna e consome o jogador que entrou na sessão por outro worker"""
+        # SELECT + DELETE numa transação (DELETE ... RETURNING exige SQLite 3.35+)
+        with self._immediate() as cursor:
+            cursor.execute("SELECT jogador FROM sessao_entrada WHERE session_id = ?", (session_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("DELETE FROM sessao_entrada WHERE session_id = ?", (session_id,))
+        return row[0]
+
+    def discard(self, session_id: str):
+        self.conn.execute("DELETE FROM sessao_espera WHERE session_id = ?", (session_id,))
+        self.conn.execute("DELETE FROM sessao_entrada WHERE session_id = ?", (session_id,))
+
+    def expire(self, before: float) -> int:
+        """Remove registros antigos deixados por workers que pararam sem limpá-los"""
+        removed = self.conn.execute("DELETE FROM sessao_espera WHERE criada < ?", (before,)).rowcount
+        removed += self.conn.execute("DELETE FROM sessao_entrada WHERE criada < ?", (before,)).rowcount
+        return removed
+
+    def waiting_ids(self) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT session_id FROM sessao_espera WHERE dono = ? ORDER BY seq", (self.worker_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def owner_of(session_id: str) -> Optional[str]:
+    """Worker dono da sessão, codificado como prefixo do ID ("<worker>.<uuid>")"""
+    owner, sep, _ = session_id.partition(".")
+    return owner if sep else None
+
+def create_session_store(kind: str, path: str, worker_id: str):
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "shared":
+        return SharedSessionStore(path, worker_id)
+    raise ValueError(f"Tipo de session store desconhecido: {kind}")
@@ -1,21 +1,97 @@
+from typing import Dict, Optional
+from fastapi import WebSocket
 from .session_manager import session_manager
+from .metrics import metrics
+from . import serializer
+from .logger import get_logger
+import asyncio
+import os
+import time
+
+logger = get_logger("ws")
+
+# Código de fechamento para conexões descartadas por falha ou timeout de envio
+SEND_FAILED_CLOSE_CODE = 1011
 
 class WebSocketManager:
-    async def broadcast_to_session(self, session_id: str, message: dict):
-        connections = session_manager.get_connections(session_id)
-        for player_name, ws in connections.items():
-            try:
-                await ws.send_json(message)
-                print(f"Message sent to {player_name}")
-            except Exception as e:
-                print(f"Error sending to {player_name}: {e}")
-    
-    async def send_to_player(self, session_id: str, player_name: str, message: dict):
+    def __init__(self, send_timeout: float = 2.0):
+        # Tempo máximo de um envio antes de considerar o cliente travado
+        self.send_timeout = send_timeout
+        self._closing = set()
+        self._broadcast_latency = metrics.histogram(
+            "compquest_broadcast_seconds",
+            "Duração de um broadcast para todos os jogadores da sessão"
+        )
+
+    async def broadcast_to_session(self, session_id: str, message: dict) -> Dict[str, Optional[float]]:
+        """Codifica a mensagem uma única vez e envia a todos os jogadores da sessão em paralelo.
+
+        Retorna a latência de envio (em segundos) por jogador; None indica falha ou
+        timeout, e nesse caso a conexão é removida da sessão e fechada.
+        """
+        if not session_manager.get_connections(session_id):
+            return {}
+        return await self.broadcast_text(session_id, self.encode(message))
+
+    async def broadcast_text(self, session_id: str, text: str) -> Dict[str, Optional[float]]:
+        """Envia um frame de texto já codificado a todos os jogadores da sessão em paralelo"""
+        connections = list(session_manager.get_connections(session_id).items())
+        if not connections:
+            return {}
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._send(ws, text) for _, ws in connections))
+        self._broadcast_latency.observe(time.perf_counter() - start)
+
+        latencies = {}
+        for (player_name, ws), (latency, error) in zip(connections, results):
+            latencies[player_name] = latency
+            if error is not None:
+                self._drop(session_id, player_name, ws, error)
+        return latencies
+
+    async def send_to_player(self, session_id: str, player_name: str, message: dict) -> Optional[float]:
         connections = session_manager.get_connections(session_id)
-        if player_name in connections:
-            try:
-                await connections[player_name].send_json(message)
-            except Exception as e:
-                print(f"Error sending to {player_name}: {e}")
+        ws = connections.get(player_name)
+        if ws is None:
+            return None
+        latency, error = await self._send(ws, self.encode(message))
+        if error is not None:
+            self._drop(session_id, player_name, ws, error)
+        return latency
+
+    def _drop(self, session_id: str, player_name: str, ws: WebSocket, error: Exception):
+        """Remove da sessão uma conexão que falhou ou estourou o timeout e a fecha
+
+        Um envio cancelado pelo timeout pode ter parado no meio do frame, então a
+        conexão não é reaproveitada: o fechamento encerra o laço de recepção dela
+        em websocket_game e o cliente vê a desconexão e pode reconectar.
+        """
+        logger.warning("Error sending to %s: %r", player_name, error)
+        session_manager.remove_connection(session_id, player_name, ws)
+        task = asyncio.create_task(self._close(ws))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(ws: WebSocket):
+        try:
+            await ws.close(code=SEND_FAILED_CLOSE_CODE)
+        except Exception:
+            # A conexão já pode estar fechada ou quebrada
+            pass
+
+    @staticmethod
+    def encode(message: dict) -> str:
+        # JSON compacto como o de WebSocket.send_json, mas com o serializer do projeto
+        return serializer.dumps(message)
+
+    async def _send(self, ws: WebSocket, text: str):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(ws.send_text(text), timeout=self.send_timeout)
+        except Exception as e:
+            return None, e
+        return time.perf_counter() - start, None
 
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager(send_timeout=float(os.getenv("COMPQUEST_WS_SEND_TIMEOUT", "2.0")))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark do log de respostas
+
+Mede o custo de AnswerLog.record no caminho da jogada (só acrescenta ao buffer)
+e a vazão de gravação de N respostas num banco descartável: em lotes com
+save_answers (log + agregados por questão) e, para comparação, uma transação
+por resposta, como seria gravando direto em cada jogada.
+
+Uso: python benchmarks/bench_answer_log.py [respostas]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from synthetic import create_scratch_db, populate_questions
+from app.utils.answer_log import AnswerLog
+
+def build_answers(n: int, n_questions: int) -> list:
+    log = AnswerLog(batch_size=n + 1, max_pending=n + 1)
+    for i in range(n):
+        question = {"id": random.randrange(1, n_questions + 1)}
+        log.answer(f"sessao{i // 10}", question, f"jogador{i % 1000}", random.random() < 0.6,
+                   random.expovariate(1 / 4.0), i % 10)
+    return log._pending
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_questions = 3_000
+    random.seed(42)
+
+    log = AnswerLog(batch_size=n + 1, max_pending=n + 1)
+    question = {"id": 1}
+    start = time.perf_counter()
+    for i in range(n):
+        log.answer("sessao", question, "ana", True, 2.5, i % 10)
+    print(f"record(): {(time.perf_counter() - start) / n * 1e6:.2f} µs por resposta")
+
+    answers = build_answers(n, n_questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, batch_size in (("lotes de 500", 500), ("uma transação por resposta", 1)):
+            path = os.path.join(tmp, f"answers_{batch_size}.db")
+            manager = create_scratch_db(path)
+            populate_questions(path, n_questions)
+            total = n if batch_size > 1 else min(n, 5_000)
+            start = time.perf_counter()
+            for offset in range(0, total, batch_size):
+                manager.save_answers(answers[offset:offset + batch_size])
+            elapsed = time.perf_counter() - start
+            print(f"{label:<28} {total / elapsed:>10.0f} respostas/s ({total} respostas)")
+            print(f"  questões mais difíceis: {manager.get_question_stats(limit=1)}")
+
+if __name__ == "__main__":
+    main()
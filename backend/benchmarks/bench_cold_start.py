@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark do custo de subida de um worker
+
+Mede, num banco com N questões já migrado:
+  - importar app.database e main num interpretador novo (subprocesso, mediana
+    de várias execuções); o import não abre mais o banco;
+  - o primeiro uso do DatabaseManager (verificação de schema_version +
+    has_questions com EXISTS), que é o que o startup paga;
+  - a inicialização antiga para comparação: todos os CREATE TABLE/INDEX IF NOT
+    EXISTS numa conexão nova mais COUNT(*) sobre pergunta.
+
+Uso: python benchmarks/bench_cold_start.py [número de questões] [execuções]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+from contextlib import closing
+
+from synthetic import create_scratch_db, populate_questions
+from app.database import DatabaseManager
+from app.schema import _create_base_tables, _add_question_hash
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_import(module: str, db_path: str, runs: int) -> float:
+    """Mediana do tempo de `import module` num interpretador novo, em ms"""
+    code = f"import time; s = time.perf_counter(); import {module}; print(time.perf_counter() - s)"
+    env = dict(os.environ, COMPQUEST_DB_PATH=db_path, COMPQUEST_LOG_LEVEL="WARNING")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]) * 1000)
+    return statistics.median(samples)
+
+def first_use(db_path: str, pool_size: int) -> bool:
+    manager = DatabaseManager(db_path, pool_size=pool_size)
+    try:
+        return manager.has_questions()
+    finally:
+        manager.close()
+
+def legacy_init(db_path: str) -> bool:
+    """Subida antiga: DDL completo com IF NOT EXISTS a cada boot e COUNT(*) das questões"""
+    with closing(sqlite3.connect(db_path)) as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON;")
+        _create_base_tables(cursor)
+        for table in ("ranking", "estatistica_jogador"):
+            cursor.execute(f"SELECT EXISTS(SELECT 1 FROM joga) AND NOT EXISTS(SELECT 1 FROM {table})")
+        _add_question_hash(cursor)
+        conn.commit()
+    with closing(sqlite3.connect(db_path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM pergunta").fetchone()[0] > 0
+
+def time_calls(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    n_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cold_start.db")
+        create_scratch_db(db_path)
+        populate_questions(db_path, n_questions)
+
+        print(f"{n_questions} questões, mediana de {runs} execuções:")
+        print(f"  import app.database                    {time_import('app.database', db_path, runs):>8.2f} ms")
+        print(f"  import main                            {time_import('main', db_path, runs):>8.2f} ms")
+        print(f"  primeiro uso (schema_version + EXISTS) {time_calls(lambda: first_use(db_path, 0), runs * 10):>8.2f} ms")
+        print(f"  primeiro uso com pool de 5 conexões    {time_calls(lambda: first_use(db_path, 5), runs * 10):>8.2f} ms")
+        print(f"  legado (DDL completo + COUNT(*))       {time_calls(lambda: legacy_init(db_path), runs * 10):>8.2f} ms")
+
+if __name__ == "__main__":
+    main()
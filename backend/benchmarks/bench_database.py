@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Micro-benchmark dos métodos do DatabaseManager em bancos sintéticos grandes
+
+Para cada tamanho (número de partidas) cria um banco descartável com jogadores,
+partidas, joga (2 linhas por partida) e contem (10 linhas por partida), e mede
+get_questions_by_difficulty, get_player_stats, get_top_players,
+get_recent_scores (a primeira página de GET /score), get_score_page (uma
+página no meio do histórico e o filtro por jogador), save_match_result e
+add_questions_to_match.
+
+Cada medição sai como uma linha JSON em stdout (o progresso vai para stderr),
+então os resultados podem ser guardados e comparados entre versões:
+
+    python benchmarks/bench_database.py > antes.jsonl
+    python benchmarks/bench_database.py --sizes 1000 100000 --pool 4 > depois.jsonl
+
+Com os tamanhos padrão o maior banco tem 100k partidas e 1M de linhas em contem.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+
+from synthetic import create_scratch_db, populate_questions, populate_matches, table_counts
+from app.database import DatabaseManager
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def time_calls(fn, make_args, repeat: int, budget: float) -> list:
+    """Chama fn(*make_args()) até `repeat` vezes ou até estourar `budget` segundos
+
+    Os argumentos são preparados fora da medição (ex.: a partida nova de cada
+    save_match_result). Retorna a duração de cada chamada em segundos.
+    """
+    samples = []
+    deadline = time.perf_counter() + budget
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+def bench_size(args, tmp: str, size: int):
+    path = os.path.join(tmp, f"database_{size}.db")
+    n_players = max(2, size // args.matches_per_player)
+
+    print(f"[{size} partidas] populando...", file=sys.stderr)
+    start = time.perf_counter()
+    create_scratch_db(path)
+    populate_questions(path, args.questions)
+    populate_matches(path, size, n_players, args.questions, args.questions_per_match)
+    populate_seconds = time.perf_counter() - start
+    rows = table_counts(path)
+
+    manager = DatabaseManager(path, pool_size=args.pool)
+    rng = random.Random(args.seed)
+    question_ids = range(1, args.questions + 1)
+
+    # Chave de uma página no meio do histórico, para medir o custo de uma página funda
+    conn = sqlite3.connect(path)
+    deep_key = conn.execute("""
+        SELECT p.data, p.id, j.id_jogador FROM partida p JOIN joga j ON j.id_partida = p.id
+        ORDER BY p.data DESC, p.id DESC, j.id_jogador DESC LIMIT 1 OFFSET ?
+    """, (rows["joga"] // 2,)).fetchone()
+    conn.close()
+
+    def new_match():
+        return (manager.create_match(), rng.randrange(1, n_players + 1), rng.randrange(0, 2001, 10), rng.random() < 0.5)
+
+    cases = [
+        ("get_questions_by_difficulty", {"limit": 4},
+         manager.get_questions_by_difficulty, lambda: (rng.choice(("facil", "medio", "dificil")), 4)),
+        ("get_questions_by_difficulty", {"limit": None},
+         manager.get_questions_by_difficulty, lambda: (rng.choice(("facil", "medio", "dificil")),)),
+        ("get_player_stats", {},
+         manager.get_player_stats, lambda: (f"jogador{rng.randrange(1, n_players + 1)}",)),
+        ("get_top_players", {"limit": 3}, manager.get_top_players, lambda: (3,)),
+        ("get_recent_scores", {"limit": 50, "route": "GET /score"}, manager.get_recent_scores, lambda: (50,)),
+        ("get_score_page", {"limit": 50, "page": "meio do histórico"},
+         manager.get_score_page, lambda: (50, deep_key)),
+        ("get_score_page", {"limit": 50, "filter": "player_name"},
+         manager.get_score_page, lambda: (50, None, f"jogador{rng.randrange(1, n_players + 1)}")),
+        ("save_match_result", {}, manager.save_match_result, new_match),
+        ("add_questions_to_match", {"questions": args.questions_per_match},
+         manager.add_questions_to_match,
+         lambda: (manager.create_match(), rng.sample(question_ids, args.questions_per_match))),
+    ]
+
+    try:
+        for method, params, fn, make_args in cases:
+            fn(*make_args())  # aquece cache de páginas e de instruções
+            samples = time_calls(fn, make_args, args.repeat, args.budget)
+            record = {
+                "benchmark": "database",
+                "method": method,
+                "params": params,
+                "size": size,
+                "players": n_players,
+                "rows": rows,
+                "pool_size": args.pool,
+                "calls": len(samples),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 4),
+                "max_ms": round(max(samples) * 1000, 4),
+                "populate_s": round(populate_seconds, 2),
+                "sqlite": sqlite3.sqlite_version,
+                "python": platform.python_version()
+            }
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+            print(f"  {method:<28} {json.dumps(params, ensure_ascii=False):<36} "
+                  f"p50 {record['p50_ms']:>9.3f} ms  p95 {record['p95_ms']:>9.3f} ms", file=sys.stderr)
+    finally:
+        manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="números de partidas")
+    parser.add_argument("--questions", type=int, default=3_000, help="questões no banco")
+    parser.add_argument("--questions-per-match", type=int, default=10)
+    parser.add_argument("--matches-per-player", type=int, default=10,
+                        help="partidas por jogador (define o número de jogadores)")
+    parser.add_argument("--pool", type=int, default=0, help="pool_size do DatabaseManager (0 = conexão por uso)")
+    parser.add_argument("--repeat", type=int, default=200, help="chamadas por método")
+    parser.add_argument("--budget", type=float, default=5.0, help="segundos máximos por método")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", help="diretório dos bancos (padrão: temporário, apagado no fim)")
+    args = parser.parse_args()
+
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+        for size in args.sizes:
+            bench_size(args, args.dir, size)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            bench_size(args, tmp, size)
+
+if __name__ == "__main__":
+    main()
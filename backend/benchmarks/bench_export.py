@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark da exportação do histórico de partidas
+
+Num banco sintético com N partidas mede vazão e pico de memória (tracemalloc)
+de GET /export/matches em NDJSON e CSV, consumindo o gerador da rota como o
+StreamingResponse faria, e, para comparação, do fetchall seguido de
+serialização que scripts como check_sqlite.py fazem.
+
+Uso: python benchmarks/bench_export.py [partidas]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import tracemalloc
+
+from synthetic import create_scratch_db, populate_questions, populate_matches
+from app.routes import export
+from app.utils.serializer import dumps
+
+def measure(fn) -> tuple:
+    """Tamanho gerado, tempo e pico de memória; o tempo vem de uma execução sem tracemalloc"""
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+def stream(manager, fmt: str):
+    def run():
+        batches = manager.iter_match_rows(batch_size=1000)
+        lines = export._csv_lines(batches) if fmt == "csv" else export._ndjson_lines(batches)
+        return sum(len(chunk) for chunk in lines)
+    return run
+
+def fetchall(path: str):
+    def run():
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("""
+                SELECT p.id, p.data, jg.nome, j.score, j.venceu, c.id_pergunta
+                FROM partida p
+                JOIN joga j ON j.id_partida = p.id
+                JOIN jogador jg ON j.id_jogador = jg.id
+                JOIN contem c ON c.id_partida = p.id
+                ORDER BY p.data
+            """).fetchall()
+        finally:
+            conn.close()
+        return len("\n".join(dumps(list(row)) for row in rows))
+    return run
+
+def main():
+    n_matches = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.db")
+        manager = create_scratch_db(path)
+        populate_questions(path, 1_000)
+        populate_matches(path, n_matches, max(n_matches // 10, 2), 1_000)
+
+        print(f"{n_matches} partidas ({2 * n_matches} linhas exportadas):")
+        for label, fn in (("streaming NDJSON", stream(manager, "ndjson")),
+                          ("streaming CSV", stream(manager, "csv")),
+                          ("fetchall + JSON", fetchall(path))):
+            size, elapsed, peak = measure(fn)
+            print(f"  {label:<18} {size / 1e6:>8.1f} MB em {elapsed:>6.2f} s"
+                  f"  ({size / 1e6 / elapsed:>5.1f} MB/s)  pico de memória {peak / 1e6:>8.1f} MB")
+
+if __name__ == "__main__":
+    main()
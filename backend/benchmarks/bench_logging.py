@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark do custo de logging no caminho quente
+
+Simula o envio de N questões (o antigo send_question fazia 4 print() por
+rodada) com a saída ligada a um pipe lento, como um stdout redirecionado para
+um coletor de logs. Mede quantas mensagens por segundo a thread do event loop
+consegue processar em cada cenário:
+
+  print            print() síncrono, o comportamento antigo
+  logging debug    logs de debug ligados, escritos pela thread do QueueListener
+  logging info     nível padrão: os logs de debug do caminho quente são descartados
+  sem logging      nenhuma chamada de log (referência)
+
+Uso: python benchmarks/bench_logging.py [n_mensagens] [bytes_por_leitura_do_pipe]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import logger as app_logger
+
+QUESTION = {
+    "question": "Qual estrutura de dados segue a política FIFO?",
+    "options": ["Pilha", "Fila", "Árvore", "Grafo"],
+    "answer": "Fila"
+}
+
+log = app_logger.get_logger("game")
+
+class SlowPipe:
+    """Pipe cujo leitor consome `chunk` bytes por milissegundo"""
+
+    def __init__(self, chunk: int):
+        read_fd, write_fd = os.pipe()
+        self.reader = os.fdopen(read_fd, "rb", buffering=0)
+        self.writer = os.fdopen(write_fd, "w", buffering=1, encoding="utf-8")
+        self.chunk = chunk
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def _drain(self):
+        while self.reader.read(self.chunk):
+            time.sleep(0.001)
+
+    def close(self):
+        self.writer.close()
+        self.thread.join()
+        self.reader.close()
+
+def send_print(idx: int, session_id: str):
+    print(f"Enviando questão {idx + 1} para sessão {session_id}")
+    print(f"Questão: {QUESTION['question']}")
+    print(f"Opções: {QUESTION['options']}")
+    print(f"Resposta correta: '{QUESTION['answer']}'")
+
+def send_logging(idx: int, session_id: str):
+    log.debug("Enviando questão %d para sessão %s: %s | opções: %s | resposta correta: '%s'",
+              idx + 1, session_id, QUESTION["question"], QUESTION["options"], QUESTION["answer"])
+
+def send_nothing(idx: int, session_id: str):
+    pass
+
+def run(label: str, n: int, chunk: int, send, level: str = None):
+    pipe = SlowPipe(chunk)
+    stdout = sys.stdout
+    if level is not None:
+        os.environ["COMPQUEST_LOG_LEVEL"] = level
+        app_logger.setup_logging(stream=pipe.writer)
+    elif send is send_print:
+        sys.stdout = pipe.writer
+
+    start = time.perf_counter()
+    for i in range(n):
+        send(i % 10, "4f1c2a9e-sessao")
+    elapsed = time.perf_counter() - start
+
+    sys.stdout = stdout
+    drain_start = time.perf_counter()
+    if level is not None:
+        app_logger.stop_logging()
+    pipe.close()
+    drain = time.perf_counter() - drain_start
+
+    print(f"  {label:<16} {n / elapsed:>12,.0f} msgs/s  {elapsed / n * 1e6:>8.2f} µs/msg  (escoamento depois: {drain:.2f}s)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    print(f"{n} mensagens, pipe lendo {chunk} bytes/ms")
+    run("print", n, chunk, send_print)
+    run("logging debug", n, chunk, send_logging, level="DEBUG")
+    run("logging info", n, chunk, send_logging, level="INFO")
+    run("sem logging", n, chunk, send_nothing)
+
+if __name__ == "__main__":
+    main()
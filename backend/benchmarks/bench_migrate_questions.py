@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark da migração de questões do JSON para o banco
+
+Gera um banco de questões sintético no formato de app/data/questions.json e
+mede, num banco descartável:
+  - a carga inicial (banco vazio);
+  - a recarga sem mudanças;
+  - a recarga com 1% das questões alteradas, 1% removidas e 1% novas;
+  - com --legacy, a recarga antiga (apaga tudo e reinsere uma linha por vez).
+
+Também confere que os IDs das questões mantidas não mudam entre as recargas.
+
+Uso: python benchmarks/bench_migrate_questions.py [--legacy] [número de questões]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+from synthetic import create_scratch_db
+from app.migrate_questions import sync_questions, CATEGORIES, DIFFICULTY_MAPPING
+
+DEFAULT_SIZE = 50_000
+
+def build_questions_data(n: int, start: int = 0) -> dict:
+    keys = list(DIFFICULTY_MAPPING)
+    data = {key: [] for key in keys}
+    for i in range(start, start + n):
+        options = [f"Alternativa {letter} da questão {i}" for letter in "ABCD"]
+        data[keys[i % 3]].append({
+            "question": f"Questão sintética {i}: qual o resultado da operação?",
+            "options": options,
+            "answer": options[i % 4],
+            "oracle_hint": f"Dica da questão {i}",
+            "explanation": f"Explicação da questão {i}"
+        })
+    return data
+
+def mutate(data: dict, n: int) -> dict:
+    """Altera, remove e acrescenta 1% das questões cada"""
+    questions = [q for key in data for q in data[key]]
+    step = max(1, n // (n // 100 or 1))
+    changed = {id(q) for q in questions[::step]}
+    removed = {id(q) for q in questions[1::step]}
+    result = {}
+    for key, items in data.items():
+        result[key] = []
+        for q in items:
+            if id(q) in removed:
+                continue
+            if id(q) in changed:
+                q = dict(q, explanation=q["explanation"] + " (revisada)")
+            result[key].append(q)
+    for key, items in build_questions_data(len(removed), start=n).items():
+        result[key].extend(items)
+    return result
+
+def legacy_migrate(manager, questions_data: dict):
+    """Migração antiga: DELETE de tudo e um INSERT por linha"""
+    with manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM alternativa")
+        cursor.execute("DELETE FROM pergunta")
+        cursor.execute("DELETE FROM categoria")
+        for difficulty, cat_id in CATEGORIES.items():
+            cursor.execute("INSERT INTO categoria (id, dificuldade) VALUES (?, ?)", (cat_id, difficulty))
+        for json_key, difficulty in DIFFICULTY_MAPPING.items():
+            for q in questions_data.get(json_key, []):
+                cursor.execute(
+                    "INSERT INTO pergunta (nome, dica, explicacao, id_categoria) VALUES (?, ?, ?, ?)",
+                    (q["question"], q.get("oracle_hint", ""), q.get("explanation", ""), CATEGORIES[difficulty])
+                )
+                question_id = cursor.lastrowid
+                for i, option in enumerate(q["options"]):
+                    cursor.execute(
+                        "INSERT INTO alternativa (nome, letra, correta, id_pergunta) VALUES (?, ?, ?, ?)",
+                        (option, chr(ord("A") + i), 1 if option == q["answer"] else 0, question_id)
+                    )
+        conn.commit()
+
+def question_ids(manager) -> dict:
+    with manager.get_connection() as conn:
+        return {row[0]: row[1] for row in conn.execute("SELECT nome, id FROM pergunta WHERE ativa = 1")}
+
+def measure(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<38} {(time.perf_counter() - start) * 1000:>10.1f} ms  {result or ''}")
+    return result
+
+def main():
+    args = sys.argv[1:]
+    legacy = "--legacy" in args
+    sizes = [int(a) for a in args if a != "--legacy"]
+    n = sizes[0] if sizes else DEFAULT_SIZE
+
+    data = build_questions_data(n)
+    changed = mutate(data, n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = create_scratch_db(os.path.join(tmp, "migrate.db"))
+        print(f"{n} questões:")
+        measure("carga inicial", lambda: sync_questions(manager, data))
+        before = question_ids(manager)
+        measure("recarga sem mudanças", lambda: sync_questions(manager, data))
+        measure("recarga com 1% alt./rem./novas", lambda: sync_questions(manager, changed))
+        after = question_ids(manager)
+        kept = [text for text in after if text in before]
+        assert all(before[text] == after[text] for text in kept), "IDs de questões mantidas mudaram"
+        print(f"  IDs estáveis em {len(kept)} questões mantidas")
+        if legacy:
+            measure("legado: recarga apagando tudo", lambda: legacy_migrate(manager, changed))
+
+if __name__ == "__main__":
+    main()
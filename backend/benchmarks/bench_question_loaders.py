@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark dos carregadores de questões do DatabaseManager
+
+Mede número de consultas e tempo de get_questions_by_difficulty (com e sem
+limite) e get_all_questions em bancos sintéticos de 10k, 100k e 1M questões.
+Com --legacy também mede o carregamento antigo (uma consulta de alternativas
+por questão) para comparação.
+
+Uso: python benchmarks/bench_question_loaders.py [--legacy] [tamanhos...]
+"""
+
+import os
+import sys
+import time
+import tempfile
+from contextlib import contextmanager
+
+from synthetic import create_scratch_db, populate_questions
+from app.database import DatabaseManager
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+class CountingDatabaseManager(DatabaseManager):
+    """DatabaseManager que conta as instruções SQL executadas"""
+
+    def __init__(self, db_path: str):
+        self.queries = 0
+        super().__init__(db_path)
+
+    def _count(self, statement):
+        self.queries += 1
+
+    @contextmanager
+    def get_connection(self):
+        with super().get_connection() as conn:
+            conn.set_trace_callback(self._count)
+            try:
+                yield conn
+            finally:
+                conn.set_trace_callback(None)
+
+def legacy_get_all_questions(manager: DatabaseManager):
+    """Carregamento antigo: 1 consulta de questões + 1 consulta de alternativas por questão"""
+    with manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT p.id, p.nome, p.dica, p.explicacao, c.dificuldade
+            FROM pergunta p
+            JOIN categoria c ON p.id_categoria = c.id
+            ORDER BY c.dificuldade, p.id
+        """)
+        questions = []
+        for row in cursor.fetchall():
+            cursor.execute("""
+                SELECT nome, letra, correta
+                FROM alternativa
+                WHERE id_pergunta = ?
+                ORDER BY letra
+            """, (row['id'],))
+            alternatives = [
+                {'text': a['nome'], 'letter': a['letra'], 'correct': bool(a['correta'])}
+                for a in cursor.fetchall()
+            ]
+            questions.append(manager._build_question(row, alternatives))
+        return questions
+
+def measure(manager: CountingDatabaseManager, label: str, fn):
+    manager.queries = 0
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<42} {len(result):>9} questões  {manager.queries:>9} consultas  {elapsed * 1000:>10.1f} ms")
+    del result
+
+def main():
+    args = sys.argv[1:]
+    legacy = "--legacy" in args
+    sizes = [int(a) for a in args if a != "--legacy"] or DEFAULT_SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"questions_{size}.db")
+            create_scratch_db(path)
+            populate_questions(path, size)
+            manager = CountingDatabaseManager(path)
+
+            print(f"\n{size} questões:")
+            measure(manager, "get_questions_by_difficulty('facil', 4)",
+                    lambda: manager.get_questions_by_difficulty("facil", 4))
+            measure(manager, "get_questions_by_difficulty('facil')",
+                    lambda: manager.get_questions_by_difficulty("facil"))
+            measure(manager, "get_all_questions()", manager.get_all_questions)
+            if legacy:
+                measure(manager, "legado: get_all_questions() N+1",
+                        lambda: legacy_get_all_questions(manager))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark do sorteio de questões não vistas
+
+Num banco sintético com N questões e um jogador veterano com M partidas mede:
+  - a montagem do bitmap do jogador a partir de contem ⨝ joga (ensure_loaded);
+  - pick_questions para dois jogadores com 0%, 50%, 90% e 99% do banco já visto;
+  - para comparação, o filtro ingênuo em SQL (NOT IN das partidas anteriores).
+
+Uso: python benchmarks/bench_seen_questions.py [questões] [partidas do veterano]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+
+from synthetic import create_scratch_db, populate_questions
+from app.utils.question_bank import question_bank
+from app.utils.seen_questions import SeenQuestions, seen_questions
+from app.utils.pick_questions import pick_questions
+import app.utils.seen_questions as seen_module
+
+def add_history(path: str, player_name: str, n_matches: int, question_ids: list, first_match: int):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO jogador (nome) VALUES (?)", (player_name,))
+    player_id = conn.execute("SELECT id FROM jogador WHERE nome = ?", (player_name,)).fetchone()[0]
+    matches = range(first_match, first_match + n_matches)
+    conn.executemany("INSERT INTO partida (id) VALUES (?)", [(m,) for m in matches])
+    conn.executemany("INSERT INTO joga (id_jogador, id_partida, score) VALUES (?, ?, 0)", [(player_id, m) for m in matches])
+    conn.executemany("INSERT INTO contem (id_partida, id_pergunta) VALUES (?, ?)",
+                     [(m, q) for m in matches for q in random.sample(question_ids, 10)])
+    conn.commit()
+    conn.close()
+
+def naive_sql(path: str, player_name: str, difficulty: str, k: int) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("""
+            SELECT p.id FROM pergunta p JOIN categoria c ON c.id = p.id_categoria
+            WHERE c.dificuldade = ? AND p.ativa = 1 AND p.id NOT IN (
+                SELECT c2.id_pergunta FROM contem c2
+                JOIN joga j ON j.id_partida = c2.id_partida
+                JOIN jogador jg ON jg.id = j.id_jogador
+                WHERE jg.nome = ?
+            )
+            ORDER BY RANDOM() LIMIT ?
+        """, (difficulty, player_name, k)).fetchall()
+    finally:
+        conn.close()
+
+def median_us(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def main():
+    n_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_matches = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "seen.db")
+        manager = create_scratch_db(path)
+        populate_questions(path, n_questions)
+        add_history(path, "veterano", n_matches, list(range(1, n_questions + 1)), first_match=1)
+
+        # Os módulos da aplicação usam o db_manager global: aponta-o para o banco descartável
+        seen_module.db_manager = manager
+        question_bank.load(manager.get_all_questions())
+
+        print(f"{n_questions} questões, veterano com {n_matches} partidas:")
+        load_us = median_us(lambda: SeenQuestions().ensure_loaded("veterano"), 20)
+        print(f"  montar bitmap do histórico (ensure_loaded)   {load_us / 1000:>9.2f} ms")
+        seen_questions.ensure_loaded("veterano")
+        print(f"  tamanho do bitmap                            {len(seen_questions.get('veterano')):>9} bytes")
+        sql_us = median_us(lambda: naive_sql(path, "veterano", "facil", 4), 20)
+        print(f"  SQL ingênuo NOT IN (1 dificuldade)           {sql_us / 1000:>9.2f} ms")
+
+        all_ids = list(question_bank.by_id)
+        for fraction in (0.0, 0.5, 0.9, 0.99):
+            for name in ("ana", "bia"):
+                seen_questions._bitmaps.pop(name, None)
+                seen_questions.record([name], random.sample(all_ids, int(len(all_ids) * fraction)))
+            pick_us = median_us(lambda: pick_questions(["ana", "bia"]), 200)
+            print(f"  pick_questions, {fraction:>4.0%} visto por cada jogador  {pick_us:>9.1f} µs")
+
+if __name__ == "__main__":
+    main()
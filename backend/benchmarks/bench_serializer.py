@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark dos serializadores JSON nos payloads reais do jogo
+
+Compara a biblioteca padrão (json, no mesmo formato compacto do projeto) com o
+orjson, quando instalado, codificando e decodificando os eventos round_result
+e session_ready (este com as 10 questões da sessão, como enviado ao cliente).
+
+Uso: python benchmarks/bench_serializer.py [repetições]
+"""
+
+import os
+import sys
+import json
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.session_state import GameSession
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def build_questions(n: int = 10) -> list:
+    return [{
+        "question": f"Questão {i}: qual estrutura de dados segue a política FIFO (primeiro a entrar, primeiro a sair)?",
+        "options": ["Pilha", "Fila", "Árvore binária de busca", "Grafo direcionado acíclico"],
+        "answer": "Fila",
+        "oracle_hint": "Pense na fila de um banco: quem chega primeiro é atendido primeiro.",
+        "explanation": "A fila remove os elementos na mesma ordem em que foram inseridos.",
+        "id": i
+    } for i in range(n)]
+
+def build_payloads() -> dict:
+    session = GameSession("ana", build_questions())
+    session.add_player("bia")
+    session.scores = [1340, 220]
+    session.streaks = [3, 0]
+    return {
+        "round_result": {
+            "event": "round_result",
+            "winner": "ana",
+            "answer": "Fila",
+            "answer_letter": "B",
+            "correct_answer": "Fila",
+            "correct": True,
+            "response_time": 2.37,
+            "scores": session.scores_dict(),
+            "streaks": session.streaks_dict(),
+            "explanation": "A fila remove os elementos na mesma ordem em que foram inseridos."
+        },
+        "session_ready": {"event": "session_ready", "session": session.to_dict()}
+    }
+
+def stdlib_dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+def orjson_dumps(obj) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    backends = [("json", stdlib_dumps, json.loads)]
+    if orjson is not None:
+        backends.append(("orjson", orjson_dumps, orjson.loads))
+    else:
+        print("orjson não instalado: medindo só a biblioteca padrão")
+
+    for name, payload in build_payloads().items():
+        text = stdlib_dumps(payload)
+        print(f"{name} ({len(text.encode('utf-8'))} bytes)")
+        baseline = None
+        for backend, dumps, loads in backends:
+            assert loads(dumps(payload)) == payload
+            encode = per_call_us(lambda: dumps(payload), number)
+            decode = per_call_us(lambda: loads(text), number)
+            baseline = baseline or (encode, decode)
+            print(f"  {backend:<7} encode {encode:>7.2f} µs ({baseline[0] / encode:>4.1f}x)"
+                  f"  decode {decode:>7.2f} µs ({baseline[1] / decode:>4.1f}x)")
+
+if __name__ == "__main__":
+    main()
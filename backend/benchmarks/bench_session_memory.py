@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark de memória por sessão do SessionManager
+
+Compara o layout antigo (dicionário com sub-dicionários por jogador e um set de
+prontos) com o GameSession compacto, para N sessões com dois jogadores e
+10 questões (referências compartilhadas do banco de questões, como em produção).
+
+Uso: python benchmarks/bench_session_memory.py [n_sessões]
+"""
+
+import os
+import sys
+import uuid
+import gc
+import asyncio
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.session_manager import SessionManager
+
+QUESTIONS = [{"id": i, "question": f"Questão {i}", "options": ["A", "B", "C", "D"], "answer": "A"} for i in range(10)]
+
+def legacy_session(player_name: str, questions: list) -> dict:
+    """Sessão no formato antigo de SessionManager.create_session + add_player_to_session"""
+    return {
+        "players": [player_name, "oponente"],
+        "status": "ready",
+        "questions": questions,
+        "current_index": 0,
+        "scores": {player_name: 0, "oponente": 0},
+        "streaks": {player_name: 0, "oponente": 0},
+        "has_used_turing": {player_name: False, "oponente": False},
+        "has_used_memory_stick": {player_name: False, "oponente": False},
+        "round_answered": False,
+        "round_winner": None,
+        "round_answer": None,
+        "round_start_time": None,
+        "players_ready": set()
+    }
+
+def measure(label: str, n: int, build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    holder = build(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    total = after - before
+    print(f"  {label:<22} {total / 2**20:>9.1f} MiB  {total / n:>8.0f} bytes/sessão")
+    del holder
+    return total
+
+def build_legacy(n: int):
+    sessions = {}
+    for i in range(n):
+        sessions[str(uuid.uuid4())] = legacy_session(f"jogador{i}", list(QUESTIONS))
+    return sessions
+
+def build_typed(n: int):
+    async def build():
+        manager = SessionManager()
+        for i in range(n):
+            session_id = await manager.create_session(f"jogador{i}", list(QUESTIONS))
+            await manager.add_player_to_session(session_id, "oponente")
+        return manager
+    return asyncio.run(build())
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{n} sessões com 2 jogadores:")
+    legacy = measure("dicionário (antigo)", n, build_legacy)
+    typed = measure("GameSession (__slots__)", n, build_typed)
+    print(f"  redução: {(1 - typed / legacy) * 100:.0f}%")
+
+if __name__ == "__main__":
+    main()
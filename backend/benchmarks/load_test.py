@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Teste de carga ponta a ponta com partidas jogadas por bots
+
+Sobe o servidor (uvicorn com main:app) num banco temporário, ou usa um já em
+execução com --url, e joga partidas completas com pares de bots: /launch,
+/join-session (ou /join-random-session com --random-join), WebSocket de cada
+jogador, respostas, poderes e ready_next, com concorrência configurável.
+
+Ao final mostra a vazão, p50/p95/p99 por tipo de evento (medidos do envio até
+o eco do servidor: player_answered, memory_stick_used, player_ready) e o atraso
+do event loop do servidor (métricas de /compquest/metrics) e do próprio gerador
+de carga, para saber se ele não virou o gargalo.
+
+Uso: python benchmarks/load_test.py --matches 200 --concurrency 200 [--random-join] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.auth import AUTH_TOKEN
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.messages = 0
+        self.matches = 0
+
+    def record(self, kind: str, seconds: float):
+        self.latencies[kind].append(seconds)
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+async def http_request(host: str, port: int, method: str, path: str, body: dict = None):
+    """Cliente HTTP/1.1 mínimo (uma conexão por requisição) para não depender de bibliotecas extras"""
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Authorization: Bearer {AUTH_TOKEN}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, content
+
+class Bot:
+    """Jogador simulado: responde após um tempo de reflexão e às vezes usa os poderes"""
+
+    def __init__(self, name: str, args, stats: Stats):
+        self.name = name
+        self.args = args
+        self.stats = stats
+        self.connected = asyncio.Event()
+        self.pending = {}
+        self.used_turing = False
+        self.used_memory_stick = False
+        self._think = None
+
+    async def play(self, session_id: str) -> bool:
+        url = f"{self.args.ws_base}/compquest/ws/{session_id}/{self.name}?token={AUTH_TOKEN}"
+        start = time.perf_counter()
+        async with websockets.connect(url, max_size=None, ping_interval=None) as ws:
+            self.stats.record("ws_connect", time.perf_counter() - start)
+            self.connected.set()
+            try:
+                async for raw in ws:
+                    self.stats.messages += 1
+                    if self._handle(ws, json.loads(raw)):
+                        return True
+            finally:
+                if self._think is not None:
+                    self._think.cancel()
+        return False
+
+    def _handle(self, ws, message: dict) -> bool:
+        event = message.get("event")
+        mine = message.get("player") == self.name
+        if event == "new_question":
+            # Uma nova questão invalida as ações ainda sem eco da questão anterior
+            for kind in ("answer", "use_turing", "use_memory_stick"):
+                self.pending.pop(kind, None)
+            if self._think is not None:
+                self._think.cancel()
+            self._think = asyncio.create_task(self._act(ws))
+        elif event == "player_answered":
+            if mine:
+                self._resolve("use_turing" if message.get("used_turing") else "answer")
+            else:
+                # O oponente respondeu primeiro: nossa resposta (se enviada) será ignorada
+                self.pending.pop("answer", None)
+                if self._think is not None:
+                    self._think.cancel()
+        elif event == "memory_stick_used" and mine:
+            self._resolve("use_memory_stick")
+        elif event == "memory_stick_failed":
+            self.stats.errors["memory_stick_failed"] += 1
+        elif event == "round_result":
+            self._send(ws, "ready_next", {"event": "ready_next"})
+        elif event == "player_ready" and mine:
+            self._resolve("ready_next")
+        elif event == "error":
+            self.stats.errors[message.get("message", "error")] += 1
+        return event == "game_over"
+
+    async def _act(self, ws):
+        await asyncio.sleep(random.uniform(self.args.think_min, self.args.think_max))
+        if not self.used_turing and random.random() < self.args.power_rate:
+            self.used_turing = True
+            self._send(ws, "use_turing", {"event": "use_turing"})
+        elif not self.used_memory_stick and random.random() < self.args.power_rate:
+            self.used_memory_stick = True
+            self._send(ws, "use_memory_stick", {"event": "use_memory_stick"})
+        else:
+            self._send(ws, "answer", {"event": "answer", "answer": random.choice("ABCD")})
+
+    def _send(self, ws, kind: str, message: dict):
+        self.pending[kind] = time.perf_counter()
+        asyncio.ensure_future(ws.send(json.dumps(message)))
+
+    def _resolve(self, kind: str):
+        start = self.pending.pop(kind, None)
+        if start is not None:
+            self.stats.record(kind, time.perf_counter() - start)
+
+async def play_match(index: int, args, stats: Stats, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        host, port = args.host, args.port
+        first = Bot(f"bot{args.run_id}_{index}a", args, stats)
+        second = Bot(f"bot{args.run_id}_{index}b", args, stats)
+        started = time.perf_counter()
+        tasks = []
+        try:
+            start = time.perf_counter()
+            status, content = await http_request(host, port, "POST", "/compquest/launch", {"name": first.name})
+            stats.record("http_launch", time.perf_counter() - start)
+            if status != 200:
+                stats.errors[f"launch {status}"] += 1
+                return
+            session_id = json.loads(content)["session_id"]
+
+            # Como no frontend: quem cria a sessão já se conecta e espera o oponente
+            tasks.append(asyncio.create_task(first.play(session_id)))
+            await asyncio.wait_for(first.connected.wait(), args.timeout)
+
+            start = time.perf_counter()
+            if args.random_join:
+                status, content = await http_request(host, port, "POST", "/compquest/join-random-session", {"name": second.name})
+                stats.record("http_join_random", time.perf_counter() - start)
+            else:
+                status, content = await http_request(host, port, "POST", f"/compquest/join-session/{session_id}", {"name": second.name})
+                stats.record("http_join", time.perf_counter() - start)
+            if status != 200:
+                stats.errors[f"join {status}"] += 1
+                return
+            tasks.append(asyncio.create_task(second.play(json.loads(content)["session_id"])))
+
+            results = await asyncio.wait_for(asyncio.gather(*tasks), args.timeout)
+            if all(results):
+                stats.matches += 1
+                stats.record("match", time.perf_counter() - started)
+            else:
+                stats.errors["match closed before game_over"] += 1
+        except asyncio.TimeoutError:
+            stats.errors["match timeout"] += 1
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+
+async def monitor_loop_lag(lags: list, interval: float = 0.1):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+def server_loop_lag(metrics_text: str) -> dict:
+    """Estima p50/p95/p99 do atraso do event loop do servidor pelos buckets do histograma"""
+    buckets = []
+    maximum = None
+    for line in metrics_text.splitlines():
+        if line.startswith("compquest_event_loop_lag_seconds_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets.append((float("inf") if bound == "+Inf" else float(bound), int(line.rsplit(" ", 1)[1])))
+        elif line.startswith("compquest_event_loop_lag_max_seconds "):
+            maximum = float(line.rsplit(" ", 1)[1])
+    if not buckets or buckets[-1][1] == 0:
+        return {}
+    total = buckets[-1][1]
+    result = {}
+    for p in (50, 95, 99):
+        # Limite superior do primeiro bucket que alcança o percentil
+        result[f"p{p}_le_ms"] = next(bound for bound, count in buckets if count >= total * p / 100) * 1000
+    result["max_ms"] = maximum * 1000 if maximum is not None else None
+    result["samples"] = total
+    return result
+
+def start_server(args):
+    db_dir = tempfile.mkdtemp(prefix="compquest-load-")
+    env = dict(os.environ,
+               COMPQUEST_DB_PATH=os.path.join(db_dir, "compquest.db"),
+               COMPQUEST_LOG_LEVEL=os.getenv("COMPQUEST_LOG_LEVEL", "WARNING"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", args.host, "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+
+async def wait_for_server(args, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _ = await http_request(args.host, args.port, "GET", "/compquest/health")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+async def run(args) -> dict:
+    await wait_for_server(args)
+    stats = Stats()
+    client_lags = []
+    lag_task = asyncio.create_task(monitor_loop_lag(client_lags))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def delayed(index: int):
+        # Espalha o início das partidas ao longo de --ramp segundos
+        await asyncio.sleep(args.ramp * index / max(1, args.matches))
+        await play_match(index, args, stats, semaphore)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(delayed(i) for i in range(args.matches)))
+    elapsed = time.perf_counter() - started
+    lag_task.cancel()
+
+    _, metrics_text = await http_request(args.host, args.port, "GET", "/compquest/metrics")
+    return {
+        "matches": args.matches,
+        "concurrency": args.concurrency,
+        "completed": stats.matches,
+        "elapsed_s": round(elapsed, 2),
+        "matches_per_s": round(stats.matches / elapsed, 2),
+        "ws_messages_per_s": round(stats.messages / elapsed, 1),
+        "latency_ms": {
+            kind: {
+                "count": len(values),
+                "p50": round(percentile(values, 50) * 1000, 2),
+                "p95": round(percentile(values, 95) * 1000, 2),
+                "p99": round(percentile(values, 99) * 1000, 2),
+                "max": round(max(values) * 1000, 2)
+            }
+            for kind, values in sorted(stats.latencies.items())
+        },
+        "server_loop_lag": server_loop_lag(metrics_text.decode("utf-8")),
+        "client_loop_lag_ms": {
+            "p99": round(percentile(client_lags, 99) * 1000, 2) if client_lags else None,
+            "max": round(max(client_lags) * 1000, 2) if client_lags else None
+        },
+        "errors": dict(stats.errors)
+    }
+
+def print_report(report: dict):
+    print(f"Partidas: {report['completed']}/{report['matches']} concluídas em {report['elapsed_s']}s "
+          f"(concorrência {report['concurrency']})")
+    print(f"Vazão: {report['matches_per_s']} partidas/s, {report['ws_messages_per_s']} mensagens WS/s recebidas")
+    print(f"  {'evento':<18} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, row in report["latency_ms"].items():
+        print(f"  {kind:<18} {row['count']:>7} {row['p50']:>9.2f} {row['p95']:>9.2f} {row['p99']:>9.2f} {row['max']:>9.2f}")
+    lag = report["server_loop_lag"]
+    if lag:
+        print(f"Atraso do event loop do servidor: p50 <= {lag['p50_le_ms']:g} ms, p95 <= {lag['p95_le_ms']:g} ms, "
+              f"p99 <= {lag['p99_le_ms']:g} ms, máx {lag['max_ms']:.1f} ms ({lag['samples']} amostras)")
+    client = report["client_loop_lag_ms"]
+    print(f"Atraso do event loop do gerador de carga: p99 {client['p99']} ms, máx {client['max']} ms")
+    if report["errors"]:
+        print(f"Erros: {report['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do CompQuest com partidas simuladas")
+    parser.add_argument("--matches", type=int, default=100, help="total de partidas")
+    parser.add_argument("--concurrency", type=int, default=100, help="partidas simultâneas")
+    parser.add_argument("--ramp", type=float, default=5.0, help="segundos para iniciar todas as partidas")
+    parser.add_argument("--random-join", action="store_true", help="usar /join-random-session em vez de /join-session")
+    parser.add_argument("--think-min", type=float, default=0.2, help="tempo mínimo de reflexão dos bots (s)")
+    parser.add_argument("--think-max", type=float, default=1.0, help="tempo máximo de reflexão dos bots (s)")
+    parser.add_argument("--power-rate", type=float, default=0.05, help="chance de usar um poder em cada questão")
+    parser.add_argument("--timeout", type=float, default=180.0, help="tempo máximo de uma partida (s)")
+    parser.add_argument("--url", help="servidor já em execução (ex.: http://127.0.0.1:8000); sem isso sobe um local")
+    parser.add_argument("--port", type=int, default=8765, help="porta do servidor local")
+    parser.add_argument("--json", action="store_true", help="imprime o relatório como JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        parts = urlsplit(args.url)
+        args.host, args.port = parts.hostname, parts.port or 80
+    else:
+        args.host = "127.0.0.1"
+    args.ws_base = f"ws://{args.host}:{args.port}"
+    args.run_id = f"{int(time.time()) % 100000}"
+
+    # Cada partida usa 2 WebSockets dos dois lados (bots e servidor local)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    server = None if args.url else start_server(args)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
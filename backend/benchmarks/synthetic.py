@@ -0,0 +1,111 @@
+"""Geração de bancos SQLite sintéticos para os benchmarks
+
+Os bancos são criados com o mesmo schema do DatabaseManager e preenchidos em
+massa com executemany, então milhões de linhas levam segundos.
+"""
+
+import os
+import sys
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DatabaseManager
+
+DIFFICULTIES = ("facil", "medio", "dificil")
+LETTERS = ("A", "B", "C", "D")
+
+def create_scratch_db(path: str) -> DatabaseManager:
+    """Cria um banco vazio (apagando o anterior) com o schema da aplicação"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    manager = DatabaseManager(path)
+    manager.init_database()
+    return manager
+
+def _bulk_connection(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    return conn
+
+def populate_questions(path: str, n_questions: int):
+    """Insere n_questions questões (divididas entre as dificuldades) com 4 alternativas cada"""
+    conn = _bulk_connection(path)
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO categoria (id, dificuldade) VALUES (?, ?)",
+            [(i + 1, d) for i, d in enumerate(DIFFICULTIES)]
+        )
+        conn.executemany(
+            "INSERT INTO pergunta (id, nome, dica, explicacao, id_categoria) VALUES (?, ?, ?, ?, ?)",
+            ((i, f"Questão sintética {i}", f"Dica {i}", f"Explicação {i}", i % 3 + 1)
+             for i in range(1, n_questions + 1))
+        )
+        conn.executemany(
+            "INSERT INTO alternativa (nome, letra, correta, id_pergunta) VALUES (?, ?, ?, ?)",
+            ((f"Alternativa {letter} da questão {i}", letter, 1 if letter == "A" else 0, i)
+             for i in range(1, n_questions + 1) for letter in LETTERS)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def populate_matches(path: str, n_matches: int, n_players: int, n_questions: int,
+                     questions_per_match: int = 10, seed: int = 42):
+    """Insere n_players jogadores e n_matches partidas de dois jogadores
+
+    Cada partida ganha uma linha em joga por jogador (com score e vencedor) e
+    questions_per_match linhas em contem, sorteadas entre as n_questions questões
+    já inseridas. As datas cobrem o último ano em ordem crescente de ID. Ranking e
+    totais por jogador são recalculados a partir de joga ao final.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    step = timedelta(days=365) / max(n_matches, 1)
+    conn = _bulk_connection(path)
+    try:
+        conn.executemany(
+            "INSERT INTO jogador (id, nome) VALUES (?, ?)",
+            ((i, f"jogador{i}") for i in range(1, n_players + 1))
+        )
+        conn.executemany(
+            "INSERT INTO partida (id, data) VALUES (?, ?)",
+            ((i, (start + step * i).strftime("%Y-%m-%d %H:%M:%S")) for i in range(1, n_matches + 1))
+        )
+
+        def results():
+            for match_id in range(1, n_matches + 1):
+                first = rng.randrange(n_players)
+                second = (first + rng.randrange(1, n_players)) % n_players
+                scores = (rng.randrange(0, 2001, 10), rng.randrange(0, 2001, 10))
+                winner = 0 if scores[0] >= scores[1] else 1
+                for seat, player in enumerate((first, second)):
+                    yield player + 1, match_id, scores[seat], 1 if seat == winner else 0
+
+        conn.executemany("INSERT INTO joga (id_jogador, id_partida, score, venceu) VALUES (?, ?, ?, ?)", results())
+        conn.executemany(
+            "INSERT INTO contem (id_partida, id_pergunta) VALUES (?, ?)",
+            ((match_id, question_id) for match_id in range(1, n_matches + 1)
+             for question_id in rng.sample(range(1, n_questions + 1), questions_per_match))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    manager = DatabaseManager(path)
+    manager.rebuild_leaderboard()
+    manager.rebuild_player_stats()
+
+def table_counts(path: str) -> dict:
+    """Número de linhas de cada tabela do banco"""
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("pergunta", "alternativa", "jogador", "partida", "joga", "contem")
+        }
+    finally:
+        conn.close()
@@ -318,6 +318,11 @@ def reset_database():
         print("-" * 40)
         
         cursor.execute("DELETE FROM contem")  
+        cursor.execute("DELETE FROM ranking")
+        cursor.execute("DELETE FROM estatistica_jogador")
+        cursor.execute("DELETE FROM resposta")
+        cursor.execute("DELETE FROM estatistica_pergunta")
+        cursor.execute("DELETE FROM estatistica_pergunta_tempo")
         cursor.execute("DELETE FROM joga")    
         cursor.execute("DELETE FROM partida")
         cursor.execute("DELETE FROM jogador") 
@@ -1,28 +1,60 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import HTTPException
-from app.routes import launch, websocket_routes, health, score
-from app.database import db_manager
+from app.routes import launch, websocket_routes, health, score, metrics, question_stats, export
+from app.database import db_manager, async_db_manager
 from app.migrate_questions import migrate_questions
+from app.utils.question_bank import question_bank
+from app.utils.match_persister import match_persister
+from app.utils.answer_log import answer_log
+from app.utils.scheduler import session_scheduler
+from app.utils.session_manager import session_manager
+from app.utils.loop_monitor import loop_monitor
+from app.utils.logger import get_logger, setup_logging, stop_logging
+from app.utils.responses import FastJSONResponse
 import uvicorn
 
-app = FastAPI(title="CompQuest API")
+setup_logging()
+logger = get_logger("app")
+
+app = FastAPI(title="CompQuest API", default_response_class=FastJSONResponse)
 
 @app.on_event("startup")
 async def startup_event():
-    """Executa migração se o banco de dados estiver vazio"""
-    if not db_manager.has_questions():
-        print("Banco de dados está vazio. Executando migração para carregar questões do JSON...")
+    """Executa migração se o banco de dados estiver vazio e carrega o banco de questões em memória"""
+    applied = await async_db_manager.init_database()
+    if applied:
+        logger.info("Schema do banco migrado: versões %s aplicadas", applied)
+    
+    if not await async_db_manager.has_questions():
+        logger.info("Banco de dados está vazio. Executando migração para carregar questões do JSON...")
         try:
-            migrate_questions()
-            print("Migração concluída com sucesso!")
+            await async_db_manager.run(migrate_questions)
+            logger.info("Migração concluída com sucesso!")
         except Exception as e:
-            print(f"ERRO: Falha ao migrar questões: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Falha ao migrar questões: %s", e)
     else:
-        print("Banco de dados já possui questões. Pulando migração.")
+        logger.info("Banco de dados já possui questões. Pulando migração.")
+    
+    await async_db_manager.run(question_bank.load)
+    logger.info("Banco de questões carregado: %d questões em memória", len(question_bank.by_id))
+    
+    match_persister.start()
+    answer_log.start()
+    session_manager.start_reaper()
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Encerra o agendador, grava as partidas e respostas pendentes e fecha as conexões do banco de dados"""
+    await loop_monitor.stop()
+    await session_manager.stop_reaper()
+    await session_scheduler.stop()
+    await match_persister.stop()
+    await answer_log.stop()
+    async_db_manager.shutdown()
+    db_manager.close()
+    stop_logging()
 
 @app.exception_handler(HTTPException)
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
@@ -32,12 +64,12 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
     if exc.status_code == status.HTTP_401_UNAUTHORIZED:
         # Verifica se o detail é um dict com a chave "error" (da autenticação)
         if isinstance(exc.detail, dict) and "error" in exc.detail:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"error": exc.detail["error"]}
             )
     # Para outras exceções HTTP, usa comportamento padrão
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
@@ -52,6 +84,9 @@ app.add_middleware(
 
 app.include_router(score.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(question_stats.router)
+app.include_router(export.router)
 app.include_router(launch.router)
 app.include_router(websocket_routes.router)
 
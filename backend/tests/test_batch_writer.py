@@ -0,0 +1,60 @@
+"""Testes do BatchWriter
+
+Uso (a partir de backend/): python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.batch_writer import BatchWriter
+
+class FlakyWriter(BatchWriter):
+    """Falha nas primeiras `failures` gravações e registra os lotes gravados"""
+
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(batch_size=2, flush_interval=60, **kwargs)
+        self.failures_left = failures
+        self.written = []
+
+    async def write(self, batch):
+        if self.failures_left:
+            self.failures_left -= 1
+            raise RuntimeError("database is locked")
+        self.written.extend(batch)
+
+class BatchWriterTest(unittest.TestCase):
+    def test_subclass_without_write_fails_on_creation(self):
+        class Incomplete(BatchWriter):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete(batch_size=10)
+
+class StopTest(unittest.IsolatedAsyncioTestCase):
+    async def test_stop_retries_failed_batches(self):
+        writer = FlakyWriter(failures=2)
+        writer.start()
+        for item in range(5):
+            writer._add(item)
+        await writer.stop()
+
+        self.assertEqual(writer.written, [0, 1, 2, 3, 4])
+        self.assertEqual(writer.pending, 0)
+        self.assertEqual(writer.dropped, 0)
+
+    async def test_stop_logs_what_could_not_be_saved(self):
+        writer = FlakyWriter(failures=1000, max_attempts=2)
+        for item in range(5):
+            writer._add(item)
+        with self.assertLogs("compquest.db", level="ERROR") as logs:
+            await writer.stop()
+
+        self.assertEqual(writer.pending, 0)
+        self.assertEqual(writer.dropped, 5)
+        self.assertIn("Parada com 5 itens descartados sem gravar", logs.output[-1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Testes do SessionManager
+
+Uso (a partir de backend/): python -m unittest discover -s tests
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.session_manager import SessionManager, SESSION_EXPIRED_CLOSE_CODE
+
+class FakeWebSocket:
+    """WebSocket mínimo que registra o que foi enviado e o fechamento"""
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+class EvictionTest(unittest.IsolatedAsyncioTestCase):
+    async def _ready_session(self, manager: SessionManager) -> str:
+        session_id = await manager.create_session("ana", [{"id": 1}])
+        await manager.add_player_to_session(session_id, "bia")
+        return session_id
+
+    async def test_evict_closes_connected_sockets(self):
+        manager = SessionManager()
+        session_id = await self._ready_session(manager)
+        sockets = {name: FakeWebSocket() for name in ("ana", "bia")}
+        for name, websocket in sockets.items():
+            manager.add_connection(session_id, name, websocket)
+
+        manager.evict(session_id, "ready")
+        await asyncio.gather(*manager._background)
+
+        self.assertIsNone(manager.get_session(session_id))
+        self.assertEqual(manager.get_connections(session_id), {})
+        for websocket in sockets.values():
+            self.assertEqual(websocket.close_code, SESSION_EXPIRED_CLOSE_CODE)
+            self.assertEqual(websocket.sent[-1]["event"], "session_expired")
+            self.assertEqual(websocket.sent[-1]["reason"], "ready")
+
+    async def test_lru_eviction_closes_sockets_of_live_game(self):
+        manager = SessionManager(max_sessions=1)
+        session_id = await self._ready_session(manager)
+        websocket = FakeWebSocket()
+        manager.add_connection(session_id, "ana", websocket)
+
+        await manager.create_session("caio", [{"id": 2}])
+        await asyncio.gather(*manager._background)
+
+        self.assertIsNone(manager.get_session(session_id))
+        self.assertEqual(websocket.close_code, SESSION_EXPIRED_CLOSE_CODE)
+        self.assertEqual(manager.evictions["lru"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -370,6 +370,23 @@ function connectWS(sessionId) {
             }, 5000);
         }
 
+        if (data.event === "session_expired") {
+            let message = `<strong>⌛ Sessão Expirada</strong><br><br>`;
+            message += `${data.message || "A sessão foi encerrada pelo servidor."}<br><br>`;
+            message += `Crie ou entre em uma nova sessão para jogar.`;
+
+            modalScores.style.display = 'none';
+            modalStreaks.style.display = 'none';
+
+            modalButtonHandler = () => {
+                hideModal();
+                redirectToMenu();
+            };
+
+            modalNextBtn.textContent = 'Voltar ao Menu';
+            showModal("Partida Encerrada", message, null, null, false);
+        }
+
         if (data.event === "game_over") {
             let scores = data.final_scores;
             let maxScore = Math.max(...Object.values(scores));